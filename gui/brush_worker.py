@@ -0,0 +1,122 @@
+# gui/brush_worker.py
+
+import math
+import threading
+
+import numpy as np
+
+from PyQt5.QtCore import QObject, QPoint, QRect, pyqtSignal, pyqtSlot
+
+from processing.brush_engine import DEFAULT_BRUSH_SIZE, apply_basic_brush_stroke_segment, finalize_stroke
+
+# Long segments are inked in pieces of at most this many brush sizes, so each engine call crops a
+# compact area around its part of the path instead of the whole (mostly empty) diagonal bounding box
+_MAX_SUBSEGMENT_BRUSH_SIZES = 4
+
+class BrushWorker(QObject):
+    """Runs brush-engine work for the canvas on a background thread, one request at a time in submission order."""
+    segment_done = pyqtSignal(QRect) # Canvas area inked by one segment
+    segment_failed = pyqtSignal(str)
+    stroke_finalized = pyqtSignal(QRect, QRect) # (area updated by finalization, whole stroke area)
+    finalize_failed = pyqtSignal(str, QRect) # (error, whole stroke area)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Only touched from the worker thread, so it needs no locking. The stroke's inked bounds are kept
+        # as inclusive int edges and only turned into a QRect when the stroke is finalized
+        self._stroke_has_ink = False
+        self._stroke_x0 = self._stroke_y0 = self._stroke_x1 = self._stroke_y1 = 0
+        self._stroke_failed = False
+
+        # Requests submitted but not yet finished; lets the GUI thread wait for the canvas to settle
+        self._pending_requests = 0
+        self._idle_condition = threading.Condition()
+
+    def request_submitted(self):
+        """Records a request about to be queued to this worker. Called from the GUI thread before emitting it."""
+        with self._idle_condition:
+             self._pending_requests += 1
+
+    def _request_finished(self):
+        """Helper: marks one request done; its result signals are already posted by then."""
+        with self._idle_condition:
+             self._pending_requests -= 1
+             if self._pending_requests == 0:
+                  self._idle_condition.notify_all()
+
+    def wait_for_idle(self):
+        """Blocks the calling thread until every submitted request has finished."""
+        with self._idle_condition:
+             self._idle_condition.wait_for(lambda: self._pending_requests == 0)
+
+    @pyqtSlot()
+    def begin_stroke(self):
+        """Slot: Starts tracking a new stroke."""
+        self._stroke_has_ink = False
+        self._stroke_failed = False
+        self._request_finished()
+
+    @pyqtSlot(object, QPoint, QPoint, object)
+    def apply_segment(self, lienzo, p1_canvas: QPoint, p2_canvas: QPoint, brush_params: dict):
+        """Slot: Inks one stroke segment and reports the affected canvas area."""
+        try:
+             if self._stroke_failed:
+                  return
+             max_piece_length = max(1, int(brush_params.get('size', DEFAULT_BRUSH_SIZE))) * _MAX_SUBSEGMENT_BRUSH_SIZES
+             distance = math.hypot(p2_canvas.x() - p1_canvas.x(), p2_canvas.y() - p1_canvas.y())
+             num_pieces = max(1, int(math.ceil(distance / max_piece_length)))
+             path_points = np.rint(np.linspace([p1_canvas.x(), p1_canvas.y()], [p2_canvas.x(), p2_canvas.y()], num_pieces + 1)).astype(int)
+
+             try:
+                  self._apply_pieces(lienzo, path_points.tolist(), brush_params)
+             except Exception as e:
+                  # The rest of this stroke is dropped, as it was when segments ran on the GUI thread
+                  self._stroke_failed = True
+                  self.segment_failed.emit(str(e))
+        finally:
+             self._request_finished()
+
+    def _apply_pieces(self, lienzo, path_points: list, brush_params: dict):
+        """Helper: Inks the pieces between consecutive path points; engine errors propagate to the caller."""
+        apply_segment = apply_basic_brush_stroke_segment
+        emit_segment_done = self.segment_done.emit
+        x0, y0, x1, y1 = self._stroke_x0, self._stroke_y0, self._stroke_x1, self._stroke_y1
+        has_ink = self._stroke_has_ink
+        try:
+             previous_x, previous_y = path_points[0]
+             for x, y in path_points[1:]:
+                  inked_rect_canvas = apply_segment(lienzo, QPoint(previous_x, previous_y), QPoint(x, y), brush_params)
+                  previous_x, previous_y = x, y
+                  if inked_rect_canvas.isNull() or not inked_rect_canvas.isValid():
+                       continue
+                  left, top, right, bottom = inked_rect_canvas.getCoords()
+                  if has_ink:
+                       x0, y0, x1, y1 = min(x0, left), min(y0, top), max(x1, right), max(y1, bottom)
+                  else:
+                       x0, y0, x1, y1 = left, top, right, bottom
+                       has_ink = True
+                  emit_segment_done(inked_rect_canvas)
+        finally:
+             # Pieces inked before a failure still belong to the stroke
+             self._stroke_x0, self._stroke_y0, self._stroke_x1, self._stroke_y1 = x0, y0, x1, y1
+             self._stroke_has_ink = has_ink
+
+    @pyqtSlot(object, object)
+    def finalize(self, lienzo, brush_params: dict):
+        """Slot: Finalizes the current stroke (diffusion etc.) over everything its segments inked."""
+        try:
+             stroke_rect = QRect()
+             if self._stroke_has_ink:
+                  stroke_rect = QRect(self._stroke_x0, self._stroke_y0, self._stroke_x1 - self._stroke_x0 + 1, self._stroke_y1 - self._stroke_y0 + 1)
+             # A failed stroke skips diffusion, but the pieces it inked before failing are still reported
+             if self._stroke_failed or lienzo is None or stroke_rect.isNull() or not stroke_rect.isValid():
+                  self.stroke_finalized.emit(QRect(), stroke_rect)
+                  return
+             try:
+                  updated_canvas_rect = finalize_stroke(lienzo, stroke_rect, brush_params)
+             except Exception as e:
+                  self.finalize_failed.emit(str(e), stroke_rect.normalized())
+                  return
+             self.stroke_finalized.emit(updated_canvas_rect, stroke_rect)
+        finally:
+             self._request_finished()
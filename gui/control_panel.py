@@ -4,24 +4,158 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QSlider,
                               QGroupBox, QSpacerItem, QSizePolicy, QPushButton,
                               QSpinBox, QComboBox, QColorDialog, QFrame, QGridLayout)
 from PyQt5.QtGui import QColor
-from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtCore import Qt, pyqtSignal, pyqtSlot, QTimer, QSignalBlocker, QSignalMapper
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+import time
+from types import MappingProxyType
+import numpy as np
+
+from processing.brush_engine import DEFAULT_BRUSH_SIZE
+
+# Row labels are sized/aligned once by the panel's stylesheet instead of per widget
+_PARAM_LABEL_STYLE = 'QLabel[paramLabel="true"] { min-width: 120px; max-width: 120px; qproperty-alignment: "AlignRight|AlignVCenter"; }'
+
+# Marks a parameter that has never been set, so the first value always counts as a change
+_UNSET = object()
+
+# Predefined Chinese painting colors (BGR), shared by all panels
+_CHINESE_INK_COLORS_BGR: dict[str, tuple[int, int, int]] = {
+    "墨黑": (0, 0, 0),
+    "钛白": (255, 255, 255),
+    "三青": (200, 120, 0),
+    "三绿": (100, 200, 0),
+    "花青": (150, 80, 50),
+    "朱砂": (0, 0, 255),
+    "朱磦": (0, 69, 255),
+    "胭脂": (150, 0, 200),
+    "曙红": (50, 50, 200),
+    "藤黄": (0, 215, 255),
+    "赭石": (50, 100, 150),
+    "酞青蓝": (255, 0, 0),
+}
+
+@lru_cache(maxsize=64)
+def _color_frame_style(rgb: int) -> str:
+    """Helper: stylesheet for the current color frame, keyed by 0xRRGGBB."""
+    return f"background-color: #{rgb:06x}; border: 1px solid gray;"
+
+def _preset_button_style(bgr_color, text_color):
+    """Helper: stylesheet for a predefined color button."""
+    r, g, b = bgr_color[2], bgr_color[1], bgr_color[0]
+    return f"background-color: rgb({r},{g},{b}); color: {text_color}; border: 1px solid gray;"
+
+@dataclass
+class _ParamEntry:
+    """Widgets and default value of one slider/spinbox parameter row."""
+    # Explicit __slots__ rather than dataclass(slots=True), which needs Python 3.10
+    __slots__ = ('slider', 'spinbox', 'default')
+    slider: QSlider
+    spinbox: QSpinBox
+    default: int
 
 class ControlPanel(QWidget):
-    parameters_changed = pyqtSignal(dict)
+    # Carries a read-only live view of the current parameters (MappingProxyType),
+    # not a snapshot: slots must copy it if they need to keep or mutate the values.
+    # Heavy consumers should connect with Qt.QueuedConnection (MainWindow does); a queued
+    # slot then reads whatever the state is when the event loop delivers it.
+    parameters_changed = pyqtSignal(object)
+    # Per-key delta (name, new value), emitted immediately for every actual change
+    parameter_changed = pyqtSignal(str, object)
+
+    # (label, min, max, default, param_name) for the slider rows, in layout order
+    _PARAM_SPECS = (
+        ("大小", 1, 100, DEFAULT_BRUSH_SIZE, 'size'),
+        ("密度", 0, 100, 60, 'density'),
+        ("湿润度", 0, 100, 0, 'wetness'),
+        ("飞白", 0, 100, 20, 'feibai'),
+        ("硬度", 0, 100, 50, 'hardness'),
+        ("流量", 0, 100, 100, 'flow'),
+    )
+    _JITTER_PARAM_SPECS = (
+        ("位置抖动 (%)", 0, 100, 0, 'pos_jitter'),
+        ("大小抖动 (%)", 0, 100, 0, 'size_jitter'),
+    )
+    # Angle rows are only built when an angle mode needs them (see _ensure_angle_widgets)
+    _ANGLE_PARAM_SPECS = {
+        'fixed_angle': ("固定角度", 0, 360, 0, 'fixed_angle'),
+        'angle_jitter': ("角度抖动 (度)", 0, 180, 0, 'angle_jitter'),
+    }
+    # Row label strings, built once per class rather than concatenated per row
+    _LABEL_TEXTS = {spec[0]: spec[0] + ":" for spec in _PARAM_SPECS + _JITTER_PARAM_SPECS + tuple(_ANGLE_PARAM_SPECS.values())}
+    # Angle mode -> visible angle rows; bit 0 = fixed angle, bit 1 = angle jitter
+    _ANGLE_MODE_ROWS = {
+        "Direction": 0b00,
+        "Fixed": 0b01,
+        "Random": 0b00,
+        "Direction+Jitter": 0b10,
+        "Fixed+Jitter": 0b11,
+    }
+
+    # Button text color per predefined color: dark text on light colors, from one vectorized luminance pass
+    _PRESET_LUMINANCE = np.array(list(_CHINESE_INK_COLORS_BGR.values()), dtype=np.float32) @ np.array([0.114, 0.587, 0.299], dtype=np.float32)
+    _PRESET_TEXT_COLORS = tuple(np.where(_PRESET_LUMINANCE > 180, "black", "white").tolist())
+    # (name, BGR tuple, button stylesheet) per predefined color, built once when the class is defined
+    _PREDEFINED_COLORS = tuple(
+        (name, bgr, _preset_button_style(bgr, text_color))
+        for (name, bgr), text_color in zip(_CHINESE_INK_COLORS_BGR.items(), _PRESET_TEXT_COLORS)
+    )
 
     def __init__(self, parent=None):
         super().__init__(parent)
+        # Suspend repaints while the panel is built so it is laid out once at the end
+        self.setUpdatesEnabled(False)
 
         self._current_params = {}
+        self._params_view = MappingProxyType(self._current_params)
         self._parameter_widgets = {}
+        # Parallel name/spinbox lists for the one-time seed in _read_all_parameters
+        self._param_names = []
+        self._param_spinboxes = []
+        self._seeded = False
+        # Qt-side dispatch: each mapper re-emits its source's param name to one shared slot
+        self._slider_mapper = QSignalMapper(self)
+        self._slider_mapper.mapped[str].connect(self._on_slider_mapped)
+        self._slider_press_mapper = QSignalMapper(self)
+        self._slider_press_mapper.mapped[str].connect(self._on_slider_pressed)
+        self._slider_release_mapper = QSignalMapper(self)
+        self._slider_release_mapper.mapped[str].connect(self._on_slider_released)
+        self._spinbox_mapper = QSignalMapper(self)
+        self._spinbox_mapper.mapped[str].connect(self._on_spinbox_mapped)
         self._brush_type_combo = None
         self._angle_mode_combo = None
 
         self._color_frame = None
+        self._last_rgb = None # RGB last applied to the color frame, to skip identical restyles
         self._color_dialog = None
 
+        # When throttled (the default), dragging a slider only propagates its value on release; the
+        # spinbox still follows the handle for live feedback, and clicks/keys/wheel apply immediately
+        self._throttled = True
+        # In preview mode, values are quantized to multiples of 4 while a slider is held
+        self._preview_mode = False
+        self._dragging = {}
+
+        # Nesting depth of batch() blocks and whether a change arrived inside one
+        self._batching = 0
+        self._pending = False
+
+        # Coalesces bursts of slider ticks into a single parameters_changed emission once the user
+        # pauses for _emit_delay_s; a change never waits more than one rate-limit period, and two
+        # emissions are never closer than that, so a long drag streams at most _rate_limit per second
+        self._emit_timer = QTimer(self)
+        self._emit_timer.setSingleShot(True)
+        self._emit_timer.timeout.connect(self._flush_params)
+        self._emit_delay_s = 0.02
+        self._rate_limit = 30
+        self._first_pending_time = None # When the oldest change not yet emitted arrived
+        self._last_flush_time = None
+        self._dirty = False # A change is stored but not yet emitted
+
         self.main_layout = QVBoxLayout(self)
         self.main_layout.setAlignment(Qt.AlignTop)
+        self.setStyleSheet(_PARAM_LABEL_STYLE)
 
         # --- Color Selection Group ---
         self.color_group = QGroupBox("颜色")
@@ -30,8 +164,7 @@ class ControlPanel(QWidget):
         # Current Color Display
         color_display_hbox = QHBoxLayout()
         self.current_color_label = QLabel("当前颜色:")
-        self.current_color_label.setFixedWidth(120)
-        self.current_color_label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        self.current_color_label.setProperty("paramLabel", True)
         self._color_frame = QFrame(self)
         self._color_frame.setFixedSize(80, 20)
         self._color_frame.setAutoFillBackground(True)
@@ -50,24 +183,9 @@ class ControlPanel(QWidget):
 
         # Predefined Colors
         self.predefined_colors_label = QLabel("预设颜色:")
-        self.predefined_colors_label.setFixedWidth(120)
-        self.predefined_colors_label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        self.predefined_colors_label.setProperty("paramLabel", True)
         self.color_layout.addWidget(self.predefined_colors_label)
 
-        self._chinese_ink_colors_bgr = {
-            "墨黑": (0, 0, 0),
-            "钛白": (255, 255, 255),
-            "三青": (200, 120, 0),
-            "三绿": (100, 200, 0),
-            "花青": (150, 80, 50),
-            "朱砂": (0, 0, 255),
-            "朱磦": (0, 69, 255),
-            "胭脂": (150, 0, 200),
-            "曙红": (50, 50, 200),
-            "藤黄": (0, 215, 255),
-            "赭石": (50, 100, 150),
-            "酞青蓝": (255, 0, 0),
-        }
         self._create_predefined_color_buttons(self.color_layout)
 
         self.main_layout.addWidget(self.color_group)
@@ -76,16 +194,11 @@ class ControlPanel(QWidget):
         self.brush_group = QGroupBox("笔刷参数")
         self.brush_layout = QVBoxLayout(self.brush_group)
 
-        self._create_parameter_control("大小", 1, 100, 40, 'size', self.brush_layout)
-        self._create_parameter_control("密度", 0, 100, 60, 'density', self.brush_layout)
-        self._create_parameter_control("湿润度", 0, 100, 0, 'wetness', self.brush_layout)
-        self._create_parameter_control("飞白", 0, 100, 20, 'feibai', self.brush_layout)
-        self._create_parameter_control("硬度", 0, 100, 50, 'hardness', self.brush_layout)
-        self._create_parameter_control("流量", 0, 100, 100, 'flow', self.brush_layout)
+        for spec in self._PARAM_SPECS:
+            self._create_parameter_control(*spec, self.brush_layout)
 
         self.brush_type_label = QLabel("笔刷类型:")
-        self.brush_type_label.setFixedWidth(120)
-        self.brush_type_label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        self.brush_type_label.setProperty("paramLabel", True)
         self._brush_type_combo = QComboBox()
 
         brush_type_hbox = QHBoxLayout()
@@ -94,8 +207,7 @@ class ControlPanel(QWidget):
         self.brush_layout.addLayout(brush_type_hbox)
 
         self.angle_mode_label = QLabel("角度模式:")
-        self.angle_mode_label.setFixedWidth(120)
-        self.angle_mode_label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        self.angle_mode_label.setProperty("paramLabel", True)
         self._angle_mode_combo = QComboBox()
         self._angle_mode_combo.addItems(["Direction", "Fixed", "Random", "Direction+Jitter", "Fixed+Jitter"])
         self._angle_mode_combo.setCurrentText("Direction")
@@ -105,90 +217,86 @@ class ControlPanel(QWidget):
         angle_mode_hbox.addWidget(self._angle_mode_combo, 1)
         self.brush_layout.addLayout(angle_mode_hbox)
 
-        self._create_angle_control("固定角度", 0, 360, 0, 'fixed_angle', self.brush_layout)
+        # Angle controls are only built once a mode that uses them is selected;
+        # until then the engine still receives their default values.
+        self._angle_rows = [None, None] # Indexed by _ANGLE_MODE_ROWS bit
+        self._fixed_angle_row_index = self.brush_layout.count()
+        for label_text, min_val, max_val, default_val, param_name in self._ANGLE_PARAM_SPECS.values():
+            self._current_params[param_name] = default_val
+
+        for spec in self._JITTER_PARAM_SPECS:
+            self._create_parameter_control(*spec, self.brush_layout)
 
-        self._create_parameter_control("位置抖动 (%)", 0, 100, 0, 'pos_jitter', self.brush_layout)
-        self._create_parameter_control("大小抖动 (%)", 0, 100, 0, 'size_jitter', self.brush_layout)
-        self._create_angle_control("角度抖动 (度)", 0, 180, 0, 'angle_jitter', self.brush_layout)
+        self._update_angle_rows(self._angle_mode_combo.currentText())
 
         self.main_layout.addWidget(self.brush_group)
 
         self.main_layout.addSpacerItem(QSpacerItem(20, 40, QSizePolicy.Minimum, QSizePolicy.Expanding))
 
-        self._current_params['color'] = (255, 255, 255)
-        self._update_color_display(QColor(255, 255, 255))
+        # Starts on 墨黑, the canvas's own default brush color, so the two agree whenever the first emit lands
+        self._current_params['color'] = (0, 0, 0)
+        self._update_color_display(QColor(0, 0, 0))
 
         self._connect_signals()
         
-        self._read_all_parameters()
+        with QSignalBlocker(self):
+             self._read_all_parameters()
         # Initial color is set, so emit the full initial state after reading everything else
-        self.parameters_changed.emit(self._current_params.copy())
-
-    def _create_parameter_control(self, label_text: str, min_val: int, max_val: int, default_val: int, param_name: str, parent_layout: QVBoxLayout):
-        """Helper method to create a parameter control (Slider + SpinBox)."""
-        hbox = QHBoxLayout()
-        label = QLabel(label_text + ":")
-        label.setFixedWidth(120)
-        label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
-
-        slider = QSlider(Qt.Horizontal)
-        slider.setRange(min_val, max_val)
-        slider.setValue(default_val)
-        slider.setSingleStep(1)
-        slider.setPageStep(5)
-
-        spinbox = QSpinBox()
-        spinbox.setRange(min_val, max_val)
-        spinbox.setValue(default_val)
-        spinbox.setFixedWidth(50)
-
-        slider.valueChanged.connect(spinbox.setValue)
-        spinbox.valueChanged.connect(slider.setValue)
-
-        self._parameter_widgets[param_name] = {'slider': slider, 'spinbox': spinbox, 'default': default_val}
-        self._current_params[param_name] = default_val
-
-        hbox.addWidget(label)
-        hbox.addWidget(slider, 1)
-        hbox.addWidget(spinbox)
+        self.parameters_changed.emit(self._params_view)
 
-        parent_layout.addLayout(hbox)
+        self.setUpdatesEnabled(True)
 
-        slider.valueChanged.connect(lambda value: self._on_parameter_changed(param_name, value))
-
-    def _create_angle_control(self, label_text: str, min_val: int, max_val: int, default_val: int, param_name: str, parent_layout: QVBoxLayout):
-        """Helper method to create a parameter control (Slider + SpinBox) for angle."""
+    def _build_parameter_row(self, label_text: str, min_val: int, max_val: int, default_val: int, param_name: str, page_step: int) -> QHBoxLayout:
+        """Helper method to create and register a Label + Slider + SpinBox row; the caller places the returned layout."""
         hbox = QHBoxLayout()
-        label = QLabel(label_text + ":")
-        label.setFixedWidth(120)
-        label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        label = QLabel(self._LABEL_TEXTS[label_text])
+        label.setProperty("paramLabel", True)
 
         slider = QSlider(Qt.Horizontal)
         slider.setRange(min_val, max_val)
         slider.setValue(default_val)
         slider.setSingleStep(1)
-        slider.setPageStep(10)
+        slider.setPageStep(page_step)
 
         spinbox = QSpinBox()
         spinbox.setRange(min_val, max_val)
         spinbox.setValue(default_val)
         spinbox.setFixedWidth(50)
+        spinbox.setKeyboardTracking(False) # Typed values only commit on Enter / focus-out
+        spinbox.setAccelerated(True)
 
-        slider.valueChanged.connect(spinbox.setValue)
-        spinbox.valueChanged.connect(slider.setValue)
-
-        self._parameter_widgets[param_name] = {'slider': slider, 'spinbox': spinbox, 'default': default_val}
+        self._parameter_widgets[param_name] = _ParamEntry(slider, spinbox, default_val)
+        self._param_names.append(param_name)
+        self._param_spinboxes.append(spinbox)
         self._current_params[param_name] = default_val
 
         hbox.addWidget(label)
         hbox.addWidget(slider, 1)
         hbox.addWidget(spinbox)
 
-        parent_layout.addLayout(hbox)
-
-        slider.valueChanged.connect(lambda value: self._on_parameter_changed(param_name, value))
+        self._slider_mapper.setMapping(slider, param_name)
+        slider.valueChanged.connect(self._slider_mapper.map)
+        self._slider_press_mapper.setMapping(slider, param_name)
+        slider.sliderPressed.connect(self._slider_press_mapper.map)
+        self._slider_release_mapper.setMapping(slider, param_name)
+        slider.sliderReleased.connect(self._slider_release_mapper.map)
+        self._spinbox_mapper.setMapping(spinbox, param_name)
+        spinbox.valueChanged.connect(self._spinbox_mapper.map)
         return hbox
 
+    def _create_parameter_control(self, label_text: str, min_val: int, max_val: int, default_val: int, param_name: str, parent_layout: QVBoxLayout):
+        """Helper method to create a parameter control (Slider + SpinBox)."""
+        parent_layout.addLayout(self._build_parameter_row(label_text, min_val, max_val, default_val, param_name, page_step=5))
+
+    def _create_angle_control(self, label_text: str, min_val: int, max_val: int, default_val: int, param_name: str, parent_layout: QVBoxLayout, insert_index: int = -1):
+        """Helper method to create a parameter control (Slider + SpinBox) for angle. Returns the row widget so it can be shown/hidden."""
+        row = QWidget()
+        hbox = self._build_parameter_row(label_text, min_val, max_val, default_val, param_name, page_step=10)
+        hbox.setContentsMargins(0, 0, 0, 0)
+        row.setLayout(hbox)
+        parent_layout.insertWidget(insert_index, row)
+        return row
+
     def _create_predefined_color_buttons(self, parent_layout: QVBoxLayout):
         """Creates buttons for predefined colors, arranged in rows using GridLayout."""
         # Use a grid layout for better arrangement of buttons
@@ -198,20 +306,16 @@ class ControlPanel(QWidget):
 
         buttons_per_row = 4
 
-        for i, (name, bgr_color) in enumerate(self._chinese_ink_colors_bgr.items()):
+        for i, (name, bgr_color, style) in enumerate(self._PREDEFINED_COLORS):
             row = i // buttons_per_row
             col = i % buttons_per_row
 
             color_button = QPushButton(name)
-            rgb_color = (bgr_color[2], bgr_color[1], bgr_color[0])
-
             color_button.setFixedSize(60, 25) # Fixed size buttons
+            color_button.setStyleSheet(style)
 
-            luminance = 0.299*rgb_color[0] + 0.587*rgb_color[1] + 0.114*rgb_color[2]
-            text_color = "black" if luminance > 180 else "white"
-            color_button.setStyleSheet(f"background-color: rgb({rgb_color[0]},{rgb_color[1]},{rgb_color[2]}); color: {text_color}; border: 1px solid gray;")
-
-            color_button.clicked.connect(lambda checked, c=bgr_color: self._set_current_color(QColor(c[2], c[1], c[0])))
+            color_button.setProperty('bgr', bgr_color)
+            color_button.clicked.connect(self._on_preset_color_clicked)
 
             color_grid_layout.addWidget(color_button, row, col)
 
@@ -224,36 +328,34 @@ class ControlPanel(QWidget):
             print("Error: Brush type combobox not initialized.")
             return
 
+        # clear()/addItems() emit currentTextChanged per intermediate item; keep them quiet
+        was_blocked = self._brush_type_combo.blockSignals(True)
         self._brush_type_combo.clear()
         if not brush_types:
             self._brush_type_combo.addItem("N/A")
+            self._brush_type_combo.blockSignals(was_blocked)
             self._brush_type_combo.setEnabled(False)
             self._current_params['type'] = None
             return
 
         self._brush_type_combo.setEnabled(True)
         self._brush_type_combo.addItems(brush_types)
+        self._brush_type_combo.setCurrentText(default_type if default_type in brush_types else brush_types[0])
+        self._brush_type_combo.blockSignals(was_blocked)
 
-        if default_type in brush_types:
-            self._brush_type_combo.setCurrentText(default_type)
-        else:
-            self._brush_type_combo.setCurrentIndex(0)
-
-        self._current_params['type'] = self._brush_type_combo.currentText()
-
-        try:
-             self._brush_type_combo.currentTextChanged.disconnect()
-        except TypeError:
-             pass
-        self._brush_type_combo.currentTextChanged.connect(lambda text: self._on_parameter_changed('type', text))
-
-        self._read_all_parameters()
-        self.parameters_changed.emit(self._current_params.copy())
+        # Report the final selection once (the combo's own signal was blocked above) and
+        # broadcast it now, rather than again when the debounce timer fires
+        self._on_parameter_changed('type', self._brush_type_combo.currentText())
+        if self._batching == 0:
+             self._emit_timer.stop()
+             self._flush_params()
 
     def _read_all_parameters(self):
-        """Reads current values of all controls EXCEPT color."""
-        for param_name, widgets in self._parameter_widgets.items():
-            self._current_params[param_name] = widgets['spinbox'].value()
+        """Seeds the parameter dict from the controls (EXCEPT color), once; later changes arrive incrementally."""
+        if self._seeded:
+             return
+        for param_name, spinbox in zip(self._param_names, self._param_spinboxes):
+            self._current_params[param_name] = spinbox.value()
 
         if self._brush_type_combo is not None:
              self._current_params['type'] = self._brush_type_combo.currentText()
@@ -262,22 +364,139 @@ class ControlPanel(QWidget):
              self._current_params['angle_mode'] = self._angle_mode_combo.currentText()
         else:
              self._current_params['angle_mode'] = 'Direction'
+        self._seeded = True
 
     def _on_parameter_changed(self, param_name: str, value):
-        """Internal slot: Updates param dict and emits signal."""
+        """Internal slot: Updates param dict and schedules a (debounced) emit."""
         # Ensure int values are int, and string values are string
         if isinstance(value, (int, float)):
-             self._current_params[param_name] = int(value) # Store numeric as int
-        else:
-             self._current_params[param_name] = value # Store string as string
-
-        self.parameters_changed.emit(self._current_params.copy())
-
+             value = int(value) # Store numeric as int
+             if self._dragging.get(param_name):
+                  # Coarse preview while the handle is held; the exact value is committed on release
+                  value = max(self._parameter_widgets[param_name].slider.minimum(), value & ~0x3)
+
+        # Nothing changed (e.g. a programmatic set to the current value): don't notify
+        if self._current_params.get(param_name, _UNSET) == value:
+             return
+        self._current_params[param_name] = value
+        self._dirty = True
+        self.parameter_changed.emit(param_name, value)
+
+        if self._batching > 0:
+             self._pending = True
+             return
+
+        self._schedule_flush()
+
+    @pyqtSlot(str)
+    def _on_slider_mapped(self, param_name: str):
+        """Internal slot: Mirrors a slider tick into its spinbox and forwards it, except mid-drag when throttled."""
+        entry = self._parameter_widgets[param_name]
+        slider, spinbox = entry.slider, entry.spinbox
+        value = slider.value()
+
+        # Block the spinbox so the mirror update doesn't bounce back into the slider
+        blocker = QSignalBlocker(spinbox)
+        spinbox.setValue(value)
+        blocker.unblock()
+
+        # A previewed drag still streams its coarse values
+        if self._throttled and slider.isSliderDown() and not self._dragging.get(param_name):
+            return
+        self._on_parameter_changed(param_name, value)
+
+    @pyqtSlot(str)
+    def _on_slider_pressed(self, param_name: str):
+        """Internal slot: Marks a slider as being dragged for preview quantization."""
+        if self._preview_mode:
+            self._dragging[param_name] = True
+
+    @pyqtSlot(str)
+    def _on_slider_released(self, param_name: str):
+        """Internal slot: Commits the exact final value of a throttled or previewed drag."""
+        was_previewing = self._dragging.pop(param_name, False)
+        if self._throttled or was_previewing:
+            self._on_parameter_changed(param_name, self._parameter_widgets[param_name].slider.value())
+
+    @pyqtSlot(str)
+    def _on_spinbox_mapped(self, param_name: str):
+        """Internal slot: Pushes a spinbox edit into its slider, the single forwarding path."""
+        # The slider's valueChanged (-> _on_slider_mapped) mirrors back with the spinbox blocked
+        # and is the only place that forwards to _on_parameter_changed
+        entry = self._parameter_widgets[param_name]
+        entry.slider.setValue(entry.spinbox.value())
+
+    def set_throttled(self, throttled: bool):
+        """Enables/disables release-only propagation of slider drags."""
+        self._throttled = bool(throttled)
+
+    def set_preview_mode(self, enabled: bool):
+        """Enables/disables coarse (multiple-of-4) values while a slider is being dragged."""
+        self._preview_mode = bool(enabled)
+        if not self._preview_mode:
+            self._dragging.clear()
+
+    @contextmanager
+    def batch(self):
+        """Context manager: Buffers parameter changes and emits once when the outermost block exits."""
+        self._batching += 1
+        try:
+            yield
+        finally:
+            self._batching -= 1
+            if self._batching == 0 and self._pending:
+                self._pending = False
+                self._emit_timer.stop()
+                self._flush_params()
+
+    def _schedule_flush(self):
+        """Restarts the emit timer: debounced and capped at one rate-limit period of waiting, but no sooner than one period after the last emit."""
+        now = time.perf_counter()
+        period_s = 1.0 / self._rate_limit
+        if self._first_pending_time is None:
+            self._first_pending_time = now
+        deadline = min(self._first_pending_time + period_s, now + self._emit_delay_s)
+        if self._last_flush_time is not None:
+            deadline = max(deadline, self._last_flush_time + period_s)
+        delay_s = deadline - now
+        # Restarting drops the pending timeout; only the latest state is ever emitted
+        self._emit_timer.start(max(0, round(delay_s * 1000)))
+
+    @pyqtSlot()
+    def _flush_params(self):
+        """Internal slot: Emits the latest parameter state after the debounce window."""
+        self._first_pending_time = None
+        self._last_flush_time = time.perf_counter()
+        self._dirty = False
+        self.parameters_changed.emit(self._params_view)
+
+    @pyqtSlot(str)
+    def _on_brush_type_changed(self, text: str):
+        """Internal slot: Handles brush type combo box change."""
+        self._on_parameter_changed('type', text)
+
+    def _ensure_angle_widgets(self, mask: int):
+        """Builds the angle rows selected by mask the first time they are needed."""
+        if mask & 0b01 and self._angle_rows[0] is None:
+             self._angle_rows[0] = self._create_angle_control(*self._ANGLE_PARAM_SPECS['fixed_angle'], self.brush_layout, self._fixed_angle_row_index)
+        if mask & 0b10 and self._angle_rows[1] is None:
+             self._angle_rows[1] = self._create_angle_control(*self._ANGLE_PARAM_SPECS['angle_jitter'], self.brush_layout)
+
+    def _update_angle_rows(self, mode: str):
+        """Shows only the angle rows that the given angle mode uses."""
+        mask = self._ANGLE_MODE_ROWS.get(mode, 0)
+        self._ensure_angle_widgets(mask)
+        for bit, row in enumerate(self._angle_rows):
+             if row is not None:
+                  row.setVisible(bool(mask & (1 << bit)))
+
+    @pyqtSlot(str)
     def _on_angle_mode_changed(self, text: str):
         """Internal slot: Handles angle mode combo box change."""
+        self._update_angle_rows(text)
         self._on_parameter_changed('angle_mode', text)
-        # TODO: Implement showing/hiding fixed angle/jitter specific controls based on mode
 
+    @pyqtSlot()
     def _pick_color(self):
         """Slot: Opens the color dialog to pick a color."""
         if self._color_dialog is None:
@@ -292,33 +511,52 @@ class ControlPanel(QWidget):
              self._color_dialog.colorSelected.connect(self._set_current_color)
              # self._color_dialog.currentColorChanged.connect(self._update_color_display) # Optional: Real-time preview
 
-        current_bgr = self._current_params.get('color', (255, 255, 255))
+        current_bgr = self._current_params.get('color', (0, 0, 0))
         self._color_dialog.setCurrentColor(QColor(current_bgr[2], current_bgr[1], current_bgr[0]))
 
-        self._color_dialog.exec_()
+        # Window-modal without a nested event loop, so pending timers (debounced emits) keep firing;
+        # the result arrives through colorSelected
+        self._color_dialog.open()
 
+    @pyqtSlot(QColor)
     def _set_current_color(self, color: QColor):
         """Sets the brush color from a QColor object."""
         if color.isValid():
-            bgr_color = (color.blue(), color.green(), color.red())
-            self._current_params['color'] = bgr_color
             self._update_color_display(color)
-            self.parameters_changed.emit(self._current_params.copy())
+            self._on_parameter_changed('color', (color.blue(), color.green(), color.red()))
+
+    @pyqtSlot()
+    def _on_preset_color_clicked(self):
+        """Internal slot: Sets the brush color from the BGR tuple stored on the clicked preset button."""
+        bgr_color = self.sender().property('bgr')
+        self._show_color_rgb((bgr_color[2] << 16) | (bgr_color[1] << 8) | bgr_color[0])
+        self._on_parameter_changed('color', bgr_color)
 
     def _update_color_display(self, color: QColor):
         """Updates the current color display QFrame."""
+        self._show_color_rgb(color.rgb() & 0xFFFFFF)
+
+    def _show_color_rgb(self, rgb: int):
+        """Helper: restyles the color display QFrame for a 0xRRGGBB color, skipping repeats."""
         if self._color_frame:
-            self._color_frame.setStyleSheet(f"background-color: {color.name()}; border: 1px solid gray;")
+            if rgb == self._last_rgb:
+                return
+            self._last_rgb = rgb
+            self._color_frame.setStyleSheet(_color_frame_style(rgb))
 
     def _connect_signals(self):
+        # Called once from __init__, so there are no earlier connections to drop
         if self._angle_mode_combo is not None:
-             try:
-                  self._angle_mode_combo.currentTextChanged.disconnect()
-             except TypeError:
-                  pass
              self._angle_mode_combo.currentTextChanged.connect(self._on_angle_mode_changed)
 
+        if self._brush_type_combo is not None:
+             self._brush_type_combo.currentTextChanged.connect(self._on_brush_type_changed)
+
     def get_current_parameters(self) -> dict:
-        """Returns current brush parameter values."""
-        self._read_all_parameters()
+        """Returns current brush parameter values, flushing any debounced emit first."""
+        # A caller pulling the state shouldn't be ahead of the parameters_changed subscribers
+        if self._dirty and self._batching == 0:
+             self._emit_timer.stop()
+             self._flush_params()
+        # _current_params is kept in sync by the control slots, no need to re-read the widgets
         return self._current_params.copy()
\ No newline at end of file
@@ -1,32 +1,90 @@
 # gui/ink_canvas_widget.py
 
 from PyQt5.QtWidgets import QWidget, QSizePolicy, QMessageBox, QRubberBand, QStyle
-from PyQt5.QtGui import QPainter, QPixmap, QMouseEvent, QPaintEvent, QImage, QColor, QCursor, QIcon
-from PyQt5.QtCore import Qt, QPoint, QRect, QSize, pyqtSignal, QRectF
+from PyQt5.QtGui import QPainter, QPixmap, QMouseEvent, QPaintEvent, QImage, QColor, QCursor, QIcon, QRegion, QPen
+from PyQt5 import sip
+from PyQt5.QtCore import Qt, QPoint, QPointF, QRect, QSize, pyqtSignal, pyqtSlot, QRectF, QTimer, QThread, QCoreApplication, QEvent
 
 import numpy as np
 import cv2
+import functools
 import math
 import os
 
-from processing.utils import convert_cv_to_qt
-from processing.brush_engine import apply_basic_brush_stroke_segment, finalize_stroke
 from processing.lienzo import Lienzo
+from processing.brush_engine import DEFAULT_BRUSH_SIZE
+from gui.brush_worker import BrushWorker
+
+# Edge length (canvas pixels) of the grid cells used to track which parts of the display image are stale
+_DIRTY_TILE_SIZE = 64
+
+def _stop_brush_thread(brush_thread: QThread, brush_worker: BrushWorker):
+    """Helper: Lets the worker finish its queued requests, then stops its thread and waits for it."""
+    # At interpreter exit the thread's wrapper can be torn down before the widget
+    if not sip.isdeleted(brush_thread) and brush_thread.isRunning():
+         brush_worker.wait_for_idle()
+         brush_thread.quit()
+         brush_thread.wait()
 
 class InkCanvasWidget(QWidget):
     canvas_content_changed = pyqtSignal()
-    strokeFinished = pyqtSignal()
+    strokeFinished = pyqtSignal(QRect) # Canvas area changed by the stroke
     zoomLevelChanged = pyqtSignal(float)
+    # Requests to the brush worker thread (queued)
+    stroke_begin_requested = pyqtSignal()
+    segment_requested = pyqtSignal(object, QPoint, QPoint, object) # (lienzo, p1_canvas, p2_canvas, params)
+    stroke_finalize_requested = pyqtSignal(object, object) # (lienzo, params)
+
+    # Returned by _widget_to_canvas for points off the canvas; shared, so never modify it
+    _INVALID_CANVAS_POINT = QPoint(-1, -1)
+    # Checked once per stroke in mousePressEvent; the per-segment path does no validation
+    _REQUIRED_BRUSH_PARAMS = ('size', 'density', 'wetness', 'feibai', 'hardness', 'flow', 'type', 'angle_mode', 'fixed_angle', 'pos_jitter', 'size_jitter', 'angle_jitter', 'color')
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self._lienzo: Lienzo = None
+        # A Lienzo never changes size, so its dimensions are cached for the coordinate helpers
+        self._canvas_width = 0
+        self._canvas_height = 0
 
         self._is_drawing = False
-        self._last_point_widget: QPoint = None
+        # Canvas point the next stroke segment starts from (_INVALID_CANVAS_POINT while off the canvas)
+        self._last_point_canvas: QPoint = None
+        # (from, to) canvas points of a speculative stroke tail, extrapolated one segment ahead of the
+        # last real one and drawn over the canvas (never into the Lienzo) until the worker catches up
+        self._predicted_segment_canvas: tuple[QPoint, QPoint] = None
+
+        # Stroke segments are drawn at most once per frame (~60 Hz); faster mouse moves are coalesced
+        # Kept as an (x, y) int pair: event.x()/y() are much cheaper than building a QPoint via event.pos()
+        self._pending_point_widget: tuple[int, int] = None
+        self._segment_timer = QTimer(self)
+        self._segment_timer.setSingleShot(True)
+        self._segment_timer.setInterval(16)
+        self._segment_timer.timeout.connect(self._flush_pending_segment)
+
+        # Canvas areas changed since the last frame; repainted together once per frame
+        self._pending_dirty_region = QRegion()
+        self._repaint_timer = QTimer(self)
+        self._repaint_timer.setSingleShot(True)
+        self._repaint_timer.setInterval(16)
+        self._repaint_timer.timeout.connect(self._flush_dirty_region)
+
+        # Zoomed-out views are filtered smoothly, except while a stroke is being drawn, when the cheap
+        # nearest-neighbour scaling is used; the smooth view comes back shortly after the stroke ends
+        self._smooth_scaling = True
+        self._smooth_scaling_timer = QTimer(self)
+        self._smooth_scaling_timer.setSingleShot(True)
+        self._smooth_scaling_timer.setInterval(150)
+        self._smooth_scaling_timer.timeout.connect(self._restore_smooth_scaling)
+
+        # canvas_content_changed is debounced: bursts of changes reach listeners as a single emit
+        self._content_changed_timer = QTimer(self)
+        self._content_changed_timer.setSingleShot(True)
+        self._content_changed_timer.setInterval(50)
+        self._content_changed_timer.timeout.connect(self.canvas_content_changed)
 
         self._current_brush_params = {
-            'size': 40,
+            'size': DEFAULT_BRUSH_SIZE,
             'density': 60,
             'wetness': 0,
             'feibai': 20,
@@ -42,18 +100,57 @@ class InkCanvasWidget(QWidget):
         }
 
         self._current_tool = "brush"
-
-        self._stroke_inked_region_canvas: QRect = QRect()
+        self._engine_params_snapshot: dict = None # See _engine_params
+
+        # Brush-engine work runs on its own thread; the Lienzo array is shared with it directly.
+        # The worker tracks the stroke's inked region; results come back as queued signals.
+        # The thread has no parent, so destroying the widget can't delete it while it runs; the
+        # destroyed hook (which must not touch self) stops it instead if shutdown() never ran
+        self._brush_thread = QThread()
+        self._brush_worker = BrushWorker()
+        self._brush_worker.moveToThread(self._brush_thread)
+        self.stroke_begin_requested.connect(self._brush_worker.begin_stroke, Qt.QueuedConnection)
+        self.segment_requested.connect(self._brush_worker.apply_segment, Qt.QueuedConnection)
+        self.stroke_finalize_requested.connect(self._brush_worker.finalize, Qt.QueuedConnection)
+        self._brush_worker.segment_done.connect(self._on_segment_done)
+        self._brush_worker.segment_failed.connect(self._on_segment_failed)
+        self._brush_worker.stroke_finalized.connect(self._on_stroke_finalized)
+        self._brush_worker.finalize_failed.connect(self._on_finalize_failed)
+        self._brush_thread.finished.connect(self._brush_worker.deleteLater)
+        self._brush_thread.start()
+        self.destroyed.connect(functools.partial(_stop_brush_thread, self._brush_thread, self._brush_worker))
+        if QCoreApplication.instance() is not None:
+             QCoreApplication.instance().aboutToQuit.connect(self.shutdown)
+
+        # Display copy of the canvas as Format_RGB32 (B, G, R, 0xFF bytes on little-endian machines), the
+        # format Qt blits without conversion; only the changed tiles (_dirty_tiles, (column, row) in the
+        # _DIRTY_TILE_SIZE grid) are converted into it before the next paint
+        self._display_buffer: np.ndarray = None
+        self._display_image: QImage = None
+        self._display_source: np.ndarray = None
+        self._display_version = -1 # Lienzo version the display image was last brought up to date with
+        self._dirty_tiles: set[tuple[int, int]] = set()
 
         self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         self.setMouseTracking(True)
 
         self._zoom_factor = 1.0
+        self._inv_zoom_factor = 1.0 # Kept in step with _zoom_factor so widget->canvas mapping multiplies instead of divides
+        # True at 1:1 zoom, where widget and canvas pixels line up and rect mapping is a plain translation
+        self._identity_zoom = True
         self._pan_offset_widget = QPoint(0, 0)
 
         self._is_panning = False
-        self._pan_start_widget_pos: QPoint = None
-        self._pan_start_offset: QPoint = None
+        # Pan offset minus the mouse position at the start of the pan, as ints: the new offset is
+        # just the current mouse position plus this
+        self._pan_anchor_x: int = None
+        self._pan_anchor_y: int = None
+
+        # Tool cursors are loaded once; set_current_tool also runs after every pan
+        self._tool_cursors = {}
+        for tool_name in ("brush", "eraser"):
+             custom_cursor_path = self._get_cursor_path(tool_name)
+             self._tool_cursors[tool_name] = QCursor(QPixmap(custom_cursor_path)) if custom_cursor_path else QCursor(Qt.CrossCursor)
 
         self.set_current_tool(self._current_tool)
 
@@ -68,34 +165,35 @@ class InkCanvasWidget(QWidget):
 
     def set_lienzo(self, lienzo_instance: Lienzo):
         self._lienzo = lienzo_instance
+        self._canvas_width, self._canvas_height = lienzo_instance.get_size() if lienzo_instance is not None else (0, 0)
+        self._display_source = None
+        self._display_version = -1
         self._zoom_factor = 1.0
+        self._inv_zoom_factor = 1.0
+        self._identity_zoom = True
         self._pan_offset_widget = QPoint(0, 0)
         self.zoomLevelChanged.emit(self._zoom_factor)
         self.update()
-        self.canvas_content_changed.emit()
+        self._content_changed_timer.start()
 
     def get_lienzo(self) -> Lienzo:
         return self._lienzo
 
     def set_brush_params(self, params: dict):
-        self._current_brush_params.update(params)
+        current = self._current_brush_params
+        # The panel re-sends its whole state; most deliveries change nothing
+        if all(key in current and current[key] == value for key, value in params.items()):
+             return
+        current.update(params)
+        self._engine_params_snapshot = None
 
     def set_current_tool(self, tool_name: str):
         """Sets the current tool ('brush' or 'eraser')."""
-        if tool_name in ["brush", "eraser"]:
+        if tool_name in self._tool_cursors:
+            if tool_name != self._current_tool:
+                 self._engine_params_snapshot = None
             self._current_tool = tool_name
-            if self._current_tool == "brush":
-                 custom_cursor_path = self._get_cursor_path('brush')
-                 if custom_cursor_path:
-                      self.setCursor(QCursor(QPixmap(custom_cursor_path)))
-                 else:
-                      self.setCursor(Qt.CrossCursor)
-            elif self._current_tool == "eraser":
-                 custom_cursor_path = self._get_cursor_path('eraser')
-                 if custom_cursor_path:
-                      self.setCursor(QCursor(QPixmap(custom_cursor_path)))
-                 else:
-                      self.setCursor(Qt.CrossCursor)
+            self.setCursor(self._tool_cursors[tool_name])
         else:
             print(f"Warning: Unknown tool name '{tool_name}'. Tool not changed.")
 
@@ -104,27 +202,23 @@ class InkCanvasWidget(QWidget):
         if self._lienzo is None:
              return
 
-        canvas_width, canvas_height = self._lienzo.get_size()
-        widget_width, widget_height = self.width(), self.height()
-
         self._zoom_factor = max(0.01, min(zoom_factor, 100.0))
-
-        scaled_canvas_width = canvas_width * self._zoom_factor
-        scaled_canvas_height = canvas_height * self._zoom_factor
-
-        max_px = max(0, int(widget_width - scaled_canvas_width))
-        max_py = max(0, int(widget_height - scaled_canvas_height))
-        min_px = min(0, int(widget_width - scaled_canvas_width))
-        min_py = min(0, int(widget_height - scaled_canvas_height))
-
-        clamped_pan_x = np.clip(pan_offset_widget.x(), min_px, max_px)
-        clamped_pan_y = np.clip(pan_offset_widget.y(), min_py, max_py)
-
-        self._pan_offset_widget = QPoint(int(clamped_pan_x), int(clamped_pan_y))
+        self._inv_zoom_factor = 1.0 / self._zoom_factor
+        self._identity_zoom = abs(self._zoom_factor - 1.0) < 1e-6
+        self._pan_offset_widget = self._clamp_pan_offset(pan_offset_widget.x(), pan_offset_widget.y())
 
         self.zoomLevelChanged.emit(self._zoom_factor)
         self.update()
 
+    def _clamp_pan_offset(self, pan_x: int, pan_y: int) -> QPoint:
+        """Helper: Limits a pan offset so the canvas stays inside the widget if it fits, or covers it if it doesn't."""
+        # Plain min/max: this runs for every pan mouse move, where np.clip's scalar overhead adds up
+        free_x = int(self.width() - self._canvas_width * self._zoom_factor)
+        free_y = int(self.height() - self._canvas_height * self._zoom_factor)
+        clamped_pan_x = max(min(0, free_x), min(max(0, free_x), pan_x))
+        clamped_pan_y = max(min(0, free_y), min(max(0, free_y), pan_y))
+        return QPoint(clamped_pan_x, clamped_pan_y)
+
     def get_zoom_factor(self) -> float:
         return self._zoom_factor
 
@@ -133,40 +227,184 @@ class InkCanvasWidget(QWidget):
 
     def paintEvent(self, event: QPaintEvent):
          painter = QPainter(self)
-         painter.fillRect(event.rect(), Qt.lightGray)
 
-         if self._lienzo is None or self._lienzo.get_canvas_data().size == 0:
+         if self._lienzo is None:
+             painter.fillRect(event.rect(), Qt.lightGray)
              painter.drawText(self.rect(), Qt.AlignCenter, "等待加载画布或图片...")
              return
 
-         canvas_data = self._lienzo.get_canvas_data()
-         canvas_width, canvas_height = self._lienzo.get_size()
+         canvas_width, canvas_height = self._canvas_width, self._canvas_height
          widget_width, widget_height = self.width(), self.height()
 
          if canvas_width <= 0 or canvas_height <= 0 or widget_width <= 0 or widget_height <= 0:
+              painter.fillRect(event.rect(), Qt.lightGray)
               return
 
-         pixmap = QPixmap()
+         # Only the background around the canvas needs clearing; the canvas image covers the rest.
+         # Rounding the canvas extent down leaves any partially covered edge pixel in the background
+         canvas_widget_rect = QRect(self._pan_offset_widget.x(), self._pan_offset_widget.y(),
+                                    int(canvas_width * self._zoom_factor), int(canvas_height * self._zoom_factor))
+         for background_rect in event.region().subtracted(QRegion(canvas_widget_rect)).rects():
+              painter.fillRect(background_rect, Qt.lightGray)
+         # Border-only repaints never touch the canvas image (one pixel of slack for a partial edge pixel)
+         if not event.rect().intersects(canvas_widget_rect.adjusted(0, 0, 1, 1)):
+              return
+
+         # Only the canvas pixels under the exposed area are converted; when zoomed, one pixel of slack
+         # covers the truncation in _widget_to_canvas_rect (the 1:1 mapping is exact)
+         dirty_canvas = self._widget_to_canvas_rect(event.rect())
+         if dirty_canvas.isNull():
+              return
+         if not self._identity_zoom:
+              dirty_canvas = dirty_canvas.adjusted(-1, -1, 1, 1).intersected(QRect(0, 0, canvas_width, canvas_height))
+
          try:
-             pixmap = convert_cv_to_qt(canvas_data)
+             display_image = self._sync_display_image()
          except Exception as e:
-             print(f"Error converting canvas data to QPixmap for painting: {e}")
+             print(f"Error converting canvas data to QImage for painting: {e}")
+             painter.fillRect(event.rect(), Qt.lightGray)
              painter.drawText(self.rect(), Qt.AlignCenter, "画布绘制错误!")
              return
 
-         source_rect_f = QRectF(pixmap.rect())
+         if self._identity_zoom:
+              # 1:1 view: a plain blit, with no scaling stage at all
+              painter.drawImage(self._pan_offset_widget + dirty_canvas.topLeft(), display_image, dirty_canvas)
+         else:
+              target_rect_f = QRectF(self._pan_offset_widget.x() + dirty_canvas.x() * self._zoom_factor,
+                                     self._pan_offset_widget.y() + dirty_canvas.y() * self._zoom_factor,
+                                     dirty_canvas.width() * self._zoom_factor,
+                                     dirty_canvas.height() * self._zoom_factor)
+              painter.setRenderHint(QPainter.SmoothPixmapTransform, self._smooth_scaling and self._zoom_factor < 1.0)
+              painter.drawImage(target_rect_f, display_image, QRectF(dirty_canvas))
+
+         if self._predicted_segment_canvas is not None:
+              self._draw_predicted_segment(painter)
+
+    def _draw_predicted_segment(self, painter: QPainter):
+        """Helper: Draws the speculative stroke tail as a translucent line in the brush color."""
+        p1_canvas, p2_canvas = self._predicted_segment_canvas
+        blue, green, red = self._current_brush_params.get('color', (0, 0, 0))
+        alpha = int(255 * 0.6 * max(0, min(100, self._current_brush_params.get('density', 60))) / 100)
+        pen = QPen(QColor(int(red), int(green), int(blue), alpha))
+        pen.setWidthF(max(1.0, self._current_brush_params.get('size', DEFAULT_BRUSH_SIZE) * self._zoom_factor))
+        pen.setCapStyle(Qt.RoundCap)
+        painter.setRenderHint(QPainter.Antialiasing, True)
+        painter.setPen(pen)
+        pan_x, pan_y, zoom = self._pan_offset_widget.x(), self._pan_offset_widget.y(), self._zoom_factor
+        painter.drawLine(QPointF(pan_x + (p1_canvas.x() + 0.5) * zoom, pan_y + (p1_canvas.y() + 0.5) * zoom),
+                         QPointF(pan_x + (p2_canvas.x() + 0.5) * zoom, pan_y + (p2_canvas.y() + 0.5) * zoom))
+
+    def _sync_display_image(self) -> QImage:
+        """Returns the RGB32 display image of the canvas, converting only the areas changed since the last paint."""
+        # Read before converting: a stroke landing meanwhile leaves the version stale rather than lost
+        version = self._lienzo.get_version()
+        canvas_view = self._lienzo.get_canvas_view()
+        height, width = canvas_view.shape[:2]
+        if not self._dirty_tiles and version == self._display_version:
+             return self._display_image
+        # A change nobody reported tiles for (e.g. an in-place fill) needs a full conversion
+        full_update = not self._dirty_tiles or canvas_view is not self._display_source
+        self._display_version = version
+        if full_update or self._display_buffer is None or self._display_buffer.shape[:2] != (height, width):
+             if self._display_buffer is None or self._display_buffer.shape[:2] != (height, width):
+                  self._display_buffer = np.empty((height, width, 4), dtype=np.uint8)
+                  # The QImage doesn't own the pixels; _display_buffer keeps them alive alongside it
+                  self._display_image = QImage(self._display_buffer.data, width, height, self._display_buffer.strides[0], QImage.Format_RGB32)
+             self._display_source = canvas_view
+             self._dirty_tiles.clear()
+             cv2.cvtColor(canvas_view, cv2.COLOR_BGR2BGRA, dst=self._display_buffer)
+             return self._display_image
+
+        # Horizontally adjacent tiles are converted as one run, so a stroke costs one call per tile row
+        run_start = run_end = run_row = None
+        for row, column in sorted((row, column) for column, row in self._dirty_tiles):
+             if row == run_row and column == run_end:
+                  run_end += 1
+                  continue
+             if run_row is not None:
+                  self._convert_display_span(canvas_view, run_row, run_start, run_end)
+             run_row, run_start, run_end = row, column, column + 1
+        if run_row is not None:
+             self._convert_display_span(canvas_view, run_row, run_start, run_end)
+        self._dirty_tiles.clear()
+        return self._display_image
+
+    def _convert_display_span(self, canvas_view: np.ndarray, row: int, first_column: int, end_column: int):
+        """Helper: Converts the tiles [first_column, end_column) of one tile row into the display buffer."""
+        height, width = canvas_view.shape[:2]
+        x0, y0 = first_column * _DIRTY_TILE_SIZE, row * _DIRTY_TILE_SIZE
+        if x0 >= width or y0 >= height:
+             return
+        x1, y1 = min(end_column * _DIRTY_TILE_SIZE, width), min(y0 + _DIRTY_TILE_SIZE, height)
+        cv2.cvtColor(canvas_view[y0:y1, x0:x1], cv2.COLOR_BGR2BGRA, dst=self._display_buffer[y0:y1, x0:x1])
 
-         scaled_width = canvas_width * self._zoom_factor
-         scaled_height = canvas_height * self._zoom_factor
-         target_rect_f = QRectF(self._pan_offset_widget.x(), self._pan_offset_widget.y(), scaled_width, scaled_height)
+    def mark_canvas_dirty(self, canvas_rect: QRect = None):
+        """Tells the widget the Lienzo changed in canvas_rect (the whole canvas if None) outside of its own strokes."""
+        if self._lienzo is None:
+             return
+        if canvas_rect is None:
+             self._display_version = -1 # Forces a full conversion on the next paint
+             self.update()
+             return
+        self._update_canvas_rect(canvas_rect)
 
-         painter.drawPixmap(target_rect_f, pixmap, source_rect_f)
+    def _mark_dirty_tiles(self, canvas_rect: QRect):
+        """Helper: Records every display tile overlapped by canvas_rect as needing re-upload."""
+        rect = canvas_rect.normalized()
+        if rect.isEmpty():
+             return
+        first_column, last_column = max(0, rect.left() // _DIRTY_TILE_SIZE), rect.right() // _DIRTY_TILE_SIZE
+        first_row, last_row = max(0, rect.top() // _DIRTY_TILE_SIZE), rect.bottom() // _DIRTY_TILE_SIZE
+        self._dirty_tiles.update((column, row) for row in range(first_row, last_row + 1) for column in range(first_column, last_column + 1))
+
+    def _update_canvas_rect(self, canvas_rect: QRect):
+        """Marks canvas_rect for re-upload and schedules a repaint of only the widget area showing it, merged with others in the same frame."""
+        self._mark_dirty_tiles(canvas_rect)
+        self._schedule_canvas_repaint(canvas_rect)
+
+    def _schedule_canvas_repaint(self, canvas_rect: QRect):
+        """Helper: Adds the widget area showing canvas_rect to this frame's repaint, without re-uploading any canvas pixels."""
+        widget_rect = self._canvas_to_widget_rect(canvas_rect)
+        if widget_rect.isNull():
+             return
+        if self._identity_zoom:
+             # At 1:1 the mapping is exact and pixel-aligned, so the rect is repainted as-is
+             self._pending_dirty_region += widget_rect
+        else:
+             # _canvas_to_widget_rect drops the last canvas row/column, which covers up to one zoomed pixel
+             margin = int(math.ceil(self._zoom_factor)) + 1
+             self._pending_dirty_region += widget_rect.adjusted(-margin, -margin, margin, margin)
+        if not self._repaint_timer.isActive():
+             self._repaint_timer.start()
+
+    def _set_predicted_segment(self, predicted_segment_canvas: tuple):
+        """Helper: Replaces the speculative stroke tail (None clears it), repainting where the old and new ones are drawn."""
+        brush_radius = int(self._current_brush_params.get('size', DEFAULT_BRUSH_SIZE)) // 2 + 2
+        for segment in (self._predicted_segment_canvas, predicted_segment_canvas):
+             if segment is not None:
+                  p1_canvas, p2_canvas = segment
+                  # The tiles are marked too: the worker may already have moved the Lienzo version for a
+                  # segment not reported yet, and a paint with no dirty tiles would reconvert the whole canvas
+                  self._update_canvas_rect(QRect(p1_canvas, p2_canvas).normalized().adjusted(-brush_radius, -brush_radius, brush_radius, brush_radius))
+        self._predicted_segment_canvas = predicted_segment_canvas
+
+    def _restore_smooth_scaling(self):
+        """Internal slot: Repaints the whole view with smooth scaling once drawing has gone idle."""
+        self._smooth_scaling = True
+        if self._zoom_factor < 1.0:
+             self.update()
+
+    def _flush_dirty_region(self):
+        """Internal slot: Issues one update for everything dirtied during the last frame."""
+        if not self._pending_dirty_region.isEmpty():
+             self.update(self._pending_dirty_region)
+             self._pending_dirty_region = QRegion()
 
     def mousePressEvent(self, event: QMouseEvent):
         if self._lienzo is not None and (event.button() == Qt.MidButton or event.button() == Qt.RightButton):
             self._is_panning = True
-            self._pan_start_widget_pos = event.pos()
-            self._pan_start_offset = self._pan_offset_widget
+            self._pan_anchor_x = self._pan_offset_widget.x() - event.x()
+            self._pan_anchor_y = self._pan_offset_widget.y() - event.y()
             self.setCursor(Qt.ClosedHandCursor)
             event.accept()
             return
@@ -175,124 +413,169 @@ class InkCanvasWidget(QWidget):
              super().mousePressEvent(event)
              return
 
-        required_params = ['size', 'density', 'wetness', 'feibai', 'hardness', 'flow', 'type', 'angle_mode', 'fixed_angle', 'pos_jitter', 'size_jitter', 'angle_jitter', 'color']
-        if not all(param in self._current_brush_params for param in required_params):
+        if not all(param in self._current_brush_params for param in self._REQUIRED_BRUSH_PARAMS):
              print(f"Warning: Missing brush parameter(s). Cannot start operation. Params: {self._current_brush_params}")
              QMessageBox.warning(self, "操作出错", "笔刷参数不完整，无法开始操作。")
              super().mousePressEvent(event)
              return
 
-        self._is_drawing = True
-        self._last_point_widget = event.pos()
+        # The previous stroke must be finalized (and recorded in history) before this one touches the canvas
+        self.wait_for_idle()
 
-        self._stroke_inked_region_canvas = QRect()
+        self._is_drawing = True
+        self._pending_point_widget = None
 
-        canvas_point = self._widget_to_canvas(self._last_point_widget)
+        canvas_point = self._widget_to_canvas(event.pos())
+        self._last_point_canvas = canvas_point
 
-        if canvas_point == QPoint(-1,-1):
+        if canvas_point == self._INVALID_CANVAS_POINT:
              print("Warning: Start point outside canvas bounds. Cannot start operation.")
              self._is_drawing = False
              super().mousePressEvent(event)
              return
 
-        params_for_engine = self._current_brush_params.copy()
-        params_for_engine['is_eraser'] = (self._current_tool == "eraser")
-
-        try:
-            inked_rect_canvas = apply_basic_brush_stroke_segment(
-                 self._lienzo,
-                 canvas_point,
-                 canvas_point,
-                 params_for_engine
-            )
-        except Exception as e:
-             print(f"Error in apply_basic_brush_stroke_segment during mousePress: {e}")
-             self._is_drawing = False
-             self._last_point_widget = None
-             self._stroke_inked_region_canvas = QRect()
-             QMessageBox.critical(self, "操作出错", f"处理第一个操作点时发生错误: {e}")
-             super().mousePressEvent(event)
-             return
+        self._smooth_scaling_timer.stop()
+        self._smooth_scaling = False
 
-        if inked_rect_canvas.isValid() and not inked_rect_canvas.isNull():
-            self._stroke_inked_region_canvas = self._stroke_inked_region_canvas.united(inked_rect_canvas)
-            self.update()
+        self._brush_worker.request_submitted()
+        self.stroke_begin_requested.emit()
+        self._submit_segment(canvas_point, canvas_point)
 
         super().mousePressEvent(event)
 
     def mouseMoveEvent(self, event: QMouseEvent):
         if self._is_panning:
-            if self._pan_start_widget_pos is None or self._pan_start_offset is None or self._lienzo is None:
+            if self._pan_anchor_x is None or self._lienzo is None:
                  self._is_panning = False
                  self.set_current_tool(self._current_tool)
                  super().mouseMoveEvent(event)
                  return
 
-            delta_widget = event.pos() - self._pan_start_widget_pos
-            new_pan_offset_widget = self._pan_start_offset + delta_widget
-
-            canvas_width, canvas_height = self._lienzo.get_size()
-            widget_width, widget_height = self.width(), self.height()
-
-            scaled_canvas_width = canvas_width * self._zoom_factor
-            scaled_canvas_height = canvas_height * self._zoom_factor
-
-            max_px = max(0, int(widget_width - scaled_canvas_width))
-            max_py = max(0, int(widget_height - scaled_canvas_height))
-            min_px = min(0, int(widget_width - scaled_canvas_width))
-            min_py = min(0, int(widget_height - scaled_canvas_height))
-
-            clamped_pan_x = np.clip(new_pan_offset_widget.x(), min_px, max_px)
-            clamped_pan_y = np.clip(new_pan_offset_widget.y(), min_py, max_py)
-
-            self._pan_offset_widget = QPoint(int(clamped_pan_x), int(clamped_pan_y))
+            self._pan_offset_widget = self._clamp_pan_offset(event.x() + self._pan_anchor_x, event.y() + self._pan_anchor_y)
 
             self.update()
             event.accept()
             return
 
-        if not self._is_drawing or self._lienzo is None or self._last_point_widget is None or not (event.buttons() & Qt.LeftButton):
+        if not self._is_drawing or self._lienzo is None or self._last_point_canvas is None or not (event.buttons() & Qt.LeftButton):
             super().mouseMoveEvent(event)
             return
 
-        current_point_widget = event.pos()
+        # Leading-edge throttle: draw now if the last segment is older than one frame,
+        # otherwise keep only the latest position for the timer to pick up
+        if self._segment_timer.isActive():
+             self._pending_point_widget = (event.x(), event.y())
+        else:
+             self._draw_segment_to(event.x(), event.y())
+             self._segment_timer.start()
 
-        canvas_last_point = self._widget_to_canvas(self._last_point_widget)
-        canvas_current_point = self._widget_to_canvas(current_point_widget)
+        super().mouseMoveEvent(event)
 
-        if canvas_last_point == QPoint(-1,-1) or canvas_current_point == QPoint(-1,-1) or canvas_last_point == canvas_current_point:
-             self._last_point_widget = current_point_widget
+    def _flush_pending_segment(self):
+        """Internal slot: Draws the segment to the latest coalesced mouse position, if any."""
+        if self._pending_point_widget is None:
              return
-
-        params_for_engine = self._current_brush_params.copy()
-        params_for_engine['is_eraser'] = (self._current_tool == "eraser")
-
-        try:
-            inked_rect_canvas = apply_basic_brush_stroke_segment(
-                 self._lienzo,
-                 canvas_last_point,
-                 canvas_current_point,
-                 params_for_engine
-            )
-        except Exception as e:
-             print(f"Error in apply_basic_brush_stroke_segment during mouseMove: {e}")
-             self._is_drawing = False
-             self._last_point_widget = None
-             self._stroke_inked_region_canvas = QRect()
-             super().mouseMoveEvent(event)
+        widget_x, widget_y = self._pending_point_widget
+        self._pending_point_widget = None
+        if self._is_drawing and self._lienzo is not None and self._last_point_canvas is not None:
+             self._draw_segment_to(widget_x, widget_y)
+             self._segment_timer.start()
+
+    def _draw_segment_to(self, widget_x: int, widget_y: int):
+        """Applies the stroke segment from the last point to the widget position (widget_x, widget_y) and schedules its repaint."""
+        # The anchor is kept in canvas coordinates, so only the new point needs mapping
+        canvas_last_point = self._last_point_canvas
+        canvas_current_point = self._widget_xy_to_canvas(widget_x, widget_y)
+
+        if canvas_last_point == self._INVALID_CANVAS_POINT or canvas_current_point == self._INVALID_CANVAS_POINT:
+             self._last_point_canvas = canvas_current_point
+             self._set_predicted_segment(None)
+             return
+        # The engine spaces stamps size/4 apart, so shorter moves are batched into the next segment.
+        # Keep the anchor: slow motion (or zooming out) only covers that distance over several events;
+        # mouseReleaseEvent always draws what is left
+        min_segment_length = max(1.0, self._current_brush_params.get('size', DEFAULT_BRUSH_SIZE) / 4.0)
+        if math.hypot(canvas_current_point.x() - canvas_last_point.x(), canvas_current_point.y() - canvas_last_point.y()) < min_segment_length:
              return
 
-        if inked_rect_canvas.isValid() and not inked_rect_canvas.isNull():
-            if self._stroke_inked_region_canvas.isNull():
-                self._stroke_inked_region_canvas = inked_rect_canvas
-            else:
-                self._stroke_inked_region_canvas = self._stroke_inked_region_canvas.united(inked_rect_canvas)
-
-            self.update()
-
-        self._last_point_widget = current_point_widget
-
-        super().mouseMoveEvent(event)
+        self._submit_segment(canvas_last_point, canvas_current_point)
+        self._last_point_canvas = canvas_current_point
+
+        # Extrapolate the pointer one more segment along its current direction; the eraser gets no preview
+        predicted_segment = None
+        if self._current_tool != "eraser":
+             predicted_x = max(0, min(self._canvas_width - 1, 2 * canvas_current_point.x() - canvas_last_point.x()))
+             predicted_y = max(0, min(self._canvas_height - 1, 2 * canvas_current_point.y() - canvas_last_point.y()))
+             predicted_segment = (canvas_current_point, QPoint(predicted_x, predicted_y))
+        self._set_predicted_segment(predicted_segment)
+
+    def _engine_params(self) -> dict:
+        """Helper: snapshot of the brush parameters for the engine, including the eraser flag."""
+        # Built once per parameter/tool change and shared by every request until the next one; it is
+        # replaced rather than updated, so the worker never sees it change, and the engine must not mutate it
+        if self._engine_params_snapshot is None:
+             params_for_engine = self._current_brush_params.copy()
+             params_for_engine['is_eraser'] = (self._current_tool == "eraser")
+             self._engine_params_snapshot = params_for_engine
+        return self._engine_params_snapshot
+
+    def _submit_segment(self, canvas_p1: QPoint, canvas_p2: QPoint):
+        """Queues one stroke segment to the brush worker."""
+        self._brush_worker.request_submitted()
+        self.segment_requested.emit(self._lienzo, canvas_p1, canvas_p2, self._engine_params())
+
+    @pyqtSlot(QRect)
+    def _on_segment_done(self, inked_rect_canvas: QRect):
+        """Internal slot: Repaints the area a segment inked on the worker thread."""
+        self._update_canvas_rect(inked_rect_canvas)
+
+    @pyqtSlot(str)
+    def _on_segment_failed(self, error: str):
+        """Internal slot: Abandons the current stroke after a segment failed on the worker thread."""
+        print(f"Error in apply_basic_brush_stroke_segment: {error}")
+        self._segment_timer.stop()
+        self._pending_point_widget = None
+        if self._is_drawing:
+             # The release won't finalize an abandoned stroke, so finalize it here: the worker still
+             # reports what the stroke inked, and strokeFinished records it in the history
+             self._brush_worker.request_submitted()
+             self.stroke_finalize_requested.emit(self._lienzo, self._engine_params())
+        self._is_drawing = False
+        self._last_point_canvas = None
+        self._set_predicted_segment(None)
+        self._smooth_scaling_timer.start()
+        QMessageBox.critical(self, "操作出错", f"绘制笔画时发生错误: {error}")
+
+    @pyqtSlot(QRect, QRect)
+    def _on_stroke_finalized(self, updated_canvas_rect: QRect, stroke_rect_canvas: QRect):
+        """Internal slot: Repaints after finalization and reports the finished stroke."""
+        # The blur can reach past the inked region; fall back to the stroke bounds if it did nothing
+        if not updated_canvas_rect.isNull():
+             self._update_canvas_rect(updated_canvas_rect)
+        elif not stroke_rect_canvas.isNull():
+             self._update_canvas_rect(stroke_rect_canvas)
+        self.strokeFinished.emit(updated_canvas_rect.united(stroke_rect_canvas))
+
+    @pyqtSlot(str, QRect)
+    def _on_finalize_failed(self, error: str, stroke_rect_canvas: QRect):
+        """Internal slot: Reports a failed finalization; the stroke itself is kept."""
+        print(f"Error during stroke finalization: {error}")
+        QMessageBox.critical(self, "操作出错", f"完成操作时发生错误: {error}")
+        self._update_canvas_rect(stroke_rect_canvas)
+        self.strokeFinished.emit(stroke_rect_canvas)
+
+    def wait_for_idle(self):
+        """Blocks until all queued brush work has finished and its results have been handled here."""
+        self._brush_worker.wait_for_idle()
+        # The result slots are real Qt slots (pyqtSlot), so their queued calls are posted to this widget
+        QCoreApplication.sendPostedEvents(self, QEvent.MetaCall)
+
+    def shutdown(self):
+        """Stops the brush worker thread once its queued work is done and handled here. Safe to call more than once."""
+        if self._brush_thread.isRunning():
+             # quit() alone would drop requests still queued to the worker
+             self.wait_for_idle()
+             _stop_brush_thread(self._brush_thread, self._brush_worker)
 
     def mouseReleaseEvent(self, event: QMouseEvent):
         if self._is_panning:
@@ -305,40 +588,30 @@ class InkCanvasWidget(QWidget):
              super().mouseReleaseEvent(event)
              return
 
-        required_params = ['wetness', 'size', 'is_eraser']
-        params_for_engine = self._current_brush_params.copy()
-        params_for_engine['is_eraser'] = (self._current_tool == "eraser") # Ensure is_eraser is set
+        # Draw the coalesced position first so the final segment starts where the stroke really is
+        self._segment_timer.stop()
+        self._flush_pending_segment()
+        self._segment_timer.stop()
+        if not self._is_drawing:
+             super().mouseReleaseEvent(event)
+             return
 
         # Handle the very last segment if needed
-        if self._last_point_widget is not None:
-            current_point_widget = event.pos()
-            canvas_last_point = self._widget_to_canvas(self._last_point_widget)
-            canvas_current_point = self._widget_to_canvas(current_point_widget)
-
-            if canvas_last_point != QPoint(-1,-1) and canvas_current_point != QPoint(-1,-1) and canvas_last_point != canvas_current_point:
-                 try:
-                      inked_rect_canvas = apply_basic_brush_stroke_segment(
-                           self._lienzo,
-                           canvas_last_point,
-                           canvas_current_point,
-                           params_for_engine # Pass full params
-                      )
-                      if inked_rect_canvas.isValid() and not inked_rect_canvas.isNull():
-                          if self._stroke_inked_region_canvas.isNull():
-                              self._stroke_inked_region_canvas = inked_rect_canvas
-                          else:
-                              self._stroke_inked_region_canvas = self._stroke_inked_region_canvas.united(inked_rect_canvas)
-
-                 except Exception as e:
-                      print(f"Error in apply_basic_brush_stroke_segment during mouseRelease last segment: {e}")
-
-        self._finalize_current_stroke(params_for_engine) # Pass full params
+        if self._last_point_canvas is not None:
+            canvas_last_point = self._last_point_canvas
+            canvas_current_point = self._widget_xy_to_canvas(event.x(), event.y())
 
-        self._is_drawing = False
-        self._last_point_widget = None
-        self._stroke_inked_region_canvas = QRect()
+            if canvas_last_point != self._INVALID_CANVAS_POINT and canvas_current_point != self._INVALID_CANVAS_POINT and canvas_last_point != canvas_current_point:
+                 self._submit_segment(canvas_last_point, canvas_current_point)
 
-        self.strokeFinished.emit()
+        # strokeFinished is emitted once the worker has finalized the stroke
+        self._brush_worker.request_submitted()
+        self.stroke_finalize_requested.emit(self._lienzo, self._engine_params())
+
+        self._is_drawing = False
+        self._last_point_canvas = None
+        self._set_predicted_segment(None)
+        self._smooth_scaling_timer.start()
 
         super().mouseReleaseEvent(event)
 
@@ -365,10 +638,10 @@ class InkCanvasWidget(QWidget):
                 mouse_pos_widget = event.pos()
                 canvas_pos_before_zoom = self._widget_to_canvas(mouse_pos_widget)
 
-                if canvas_pos_before_zoom == QPoint(-1, -1):
+                if canvas_pos_before_zoom == self._INVALID_CANVAS_POINT:
                      widget_center_widget = QPoint(self.width() // 2, self.height() // 2)
                      canvas_pos_before_zoom = self._widget_to_canvas(widget_center_widget)
-                     if canvas_pos_before_zoom == QPoint(-1, -1):
+                     if canvas_pos_before_zoom == self._INVALID_CANVAS_POINT:
                           canvas_pos_before_zoom = QPoint(0,0)
 
                 new_pan_offset_widget_x = mouse_pos_widget.x() - canvas_pos_before_zoom.x() * new_zoom_factor
@@ -387,52 +660,35 @@ class InkCanvasWidget(QWidget):
         new_width = event.size().width()
         new_height = event.size().height()
 
+        # Qt repaints the widget after a resize anyway; only re-clamp (and re-announce the zoom) if the
+        # pan offset actually has to move, which is rare for the small steps of a live window drag
         if new_width > 0 and new_height > 0 and self._lienzo is not None:
-             self.set_zoom_pan(self._zoom_factor, self._pan_offset_widget)
+             if self._clamp_pan_offset(self._pan_offset_widget.x(), self._pan_offset_widget.y()) != self._pan_offset_widget:
+                  self.set_zoom_pan(self._zoom_factor, self._pan_offset_widget)
 
         super().resizeEvent(event)
 
-    def _finalize_current_stroke(self, params_for_engine: dict):
-        if self._lienzo is None or self._stroke_inked_region_canvas.isNull() or not self._stroke_inked_region_canvas.isValid():
-             return
-
-        try:
-            updated_canvas_rect = finalize_stroke(
-                 self._lienzo,
-                 self._stroke_inked_region_canvas,
-                 params_for_engine
-            )
-        except Exception as e:
-             print(f"Error during stroke finalization: {e}")
-             updated_canvas_rect = self._stroke_inked_region_canvas.normalized()
-             QMessageBox.critical(self, "操作出错", f"完成操作时发生错误: {e}")
-
-        self.update()
-
     def _widget_to_canvas(self, widget_point: QPoint) -> QPoint:
         """Converts a point from widget coordinates to canvas data coordinates, considering zoom and pan."""
-        if self._lienzo is None or self._zoom_factor <= 0 or self.width() <= 0 or self.height() <= 0:
-             return QPoint(-1, -1)
-
-        relative_widget_x = widget_point.x() - self._pan_offset_widget.x()
-        relative_widget_y = widget_point.y() - self._pan_offset_widget.y()
-
-        canvas_x = int(relative_widget_x / self._zoom_factor)
-        canvas_y = int(relative_widget_y / self._zoom_factor)
-
-        canvas_width, canvas_height = self._lienzo.get_size()
-        if canvas_width <= 0 or canvas_height <= 0:
-             return QPoint(-1, -1)
-
-        if not (0 <= canvas_x < canvas_width and 0 <= canvas_y < canvas_height):
-             return QPoint(-1, -1)
-
-        return QPoint(canvas_x, canvas_y)
+        return self._widget_xy_to_canvas(widget_point.x(), widget_point.y())
+
+    def _widget_xy_to_canvas(self, widget_x: int, widget_y: int) -> QPoint:
+        """Converts widget coordinates given as plain numbers to a canvas point (_INVALID_CANVAS_POINT if off the canvas)."""
+        # Plain arithmetic on cached scalars: this runs for every mouse sample of a stroke.
+        # Without a Lienzo the cached size is 0x0, so every point is rejected
+        pan_offset = self._pan_offset_widget
+        canvas_x = int((widget_x - pan_offset.x()) * self._inv_zoom_factor)
+        canvas_y = int((widget_y - pan_offset.y()) * self._inv_zoom_factor)
+        if 0 <= canvas_x < self._canvas_width and 0 <= canvas_y < self._canvas_height:
+             return QPoint(canvas_x, canvas_y)
+        return self._INVALID_CANVAS_POINT
 
     def _canvas_to_widget_rect(self, canvas_rect: QRect) -> QRect:
         """Converts a rectangle from canvas data coordinates to widget coordinates, considering zoom and pan."""
         if self._lienzo is None or self._zoom_factor <= 0 or canvas_rect.isNull():
              return QRect()
+        if self._identity_zoom:
+             return canvas_rect.translated(self._pan_offset_widget)
 
         widget_x1 = int(canvas_rect.left() * self._zoom_factor + self._pan_offset_widget.x())
         widget_y1 = int(canvas_rect.top() * self._zoom_factor + self._pan_offset_widget.y())
@@ -453,17 +709,19 @@ class InkCanvasWidget(QWidget):
         if self._lienzo is None or self._zoom_factor <= 0 or widget_rect.isNull():
              return QRect()
 
-        canvas_width, canvas_height = self._lienzo.get_size()
+        canvas_width, canvas_height = self._canvas_width, self._canvas_height
         widget_width, widget_height = self.width(), self.height()
 
         if widget_width <= 0 or widget_height <= 0 or canvas_width <= 0 or canvas_height <= 0:
              return QRect()
+        if self._identity_zoom:
+             return widget_rect.translated(-self._pan_offset_widget).intersected(QRect(0, 0, canvas_width, canvas_height))
 
-        canvas_x1_float = (widget_rect.left() - self._pan_offset_widget.x()) / self._zoom_factor
-        canvas_y1_float = (widget_rect.top() - self._pan_offset_widget.y()) / self._zoom_factor
+        canvas_x1_float = (widget_rect.left() - self._pan_offset_widget.x()) * self._inv_zoom_factor
+        canvas_y1_float = (widget_rect.top() - self._pan_offset_widget.y()) * self._inv_zoom_factor
 
-        canvas_x2_float = (widget_rect.right() - self._pan_offset_widget.x()) / self._zoom_factor
-        canvas_y2_float = (widget_rect.bottom() - self._pan_offset_widget.y()) / self._zoom_factor
+        canvas_x2_float = (widget_rect.right() - self._pan_offset_widget.x()) * self._inv_zoom_factor
+        canvas_y2_float = (widget_rect.bottom() - self._pan_offset_widget.y()) * self._inv_zoom_factor
 
         canvas_x1 = int(canvas_x1_float)
         canvas_y1 = int(canvas_y1_float)
@@ -474,8 +732,8 @@ class InkCanvasWidget(QWidget):
         canvas_w = max(0, canvas_x2 - canvas_x1)
         canvas_h = max(0, canvas_y2 - canvas_y1)
 
-        if widget_rect.width() > 0 and canvas_w == 0: canvas_w = max(1, int(widget_rect.width()/self._zoom_factor))
-        if widget_rect.height() > 0 and canvas_h == 0: canvas_h = max(1, int(widget_rect.height()/self._zoom_factor))
+        if widget_rect.width() > 0 and canvas_w == 0: canvas_w = max(1, int(widget_rect.width() * self._inv_zoom_factor))
+        if widget_rect.height() > 0 and canvas_h == 0: canvas_h = max(1, int(widget_rect.height() * self._inv_zoom_factor))
 
         temp_rect = QRect(canvas_x1, canvas_y1, canvas_w, canvas_h)
 
@@ -499,15 +757,21 @@ class InkCanvasWidget(QWidget):
              QMessageBox.critical(self, "加载出错", f"将图片数据载入画布时发生错误: {e}")
              return
         self._zoom_factor = 1.0
+        self._inv_zoom_factor = 1.0
+        self._identity_zoom = True
         self._pan_offset_widget = QPoint(0, 0)
         self.set_zoom_pan(self._zoom_factor, self._pan_offset_widget)
-        self.update()
-        self.canvas_content_changed.emit()
+        self.mark_canvas_dirty()
+        self._content_changed_timer.start()
 
-    def get_canvas_image_data(self) -> np.ndarray:
-        """Returns the current canvas content as a NumPy array (BGR uint8)."""
+    def get_canvas_image_data(self, copy: bool = True) -> np.ndarray:
+        """Returns the current canvas content as a NumPy array (BGR uint8); with copy=False, a read-only view of the live canvas for immediate reads."""
         if self._lienzo:
-            return self._lienzo.get_canvas_data().copy()
+            if copy:
+                 return self._lienzo.get_canvas_data()
+            canvas_view = self._lienzo.get_canvas_view().view()
+            canvas_view.flags.writeable = False
+            return canvas_view
         return np.empty((0, 0, 3), dtype=np.uint8)
 
     def get_canvas_size(self) -> QSize:
@@ -46,8 +46,12 @@ class MainWindow(QMainWindow):
 
         self.statusBar()
 
+        # _history[0] is the baseline (no patch); every later entry is one change, stored as the canvas
+        # area it touched with that area's pixels before and after. _history_shadow mirrors the canvas
+        # at _history_index, so a change's "before" pixels are known without copying the whole canvas
         self._history = []
         self._history_index = -1
+        self._history_shadow: np.ndarray = None
 
         self._create_actions()
         self._create_menu_bar()
@@ -182,36 +186,62 @@ class MainWindow(QMainWindow):
         self.zoom_actual_action.triggered.connect(self._zoom_actual)
         self.zoom_fit_action.triggered.connect(self._zoom_fit)
 
-        self.control_panel.parameters_changed.connect(self.canvas_widget.set_brush_params)
+        # Queued: a burst of parameter changes is delivered from the event loop instead of inside the
+        # slider's callback; the payload is a live view, so delivery always sees the latest values
+        self.control_panel.parameters_changed.connect(self.canvas_widget.set_brush_params, Qt.QueuedConnection)
 
         self.canvas_widget.strokeFinished.connect(self._on_stroke_finished)
         self.canvas_widget.canvas_content_changed.connect(self._update_status_bar)
         self.canvas_widget.zoomLevelChanged.connect(self._update_status_bar)
 
-    def _save_history_state(self):
-        """Saves the current lienzo state to the history."""
+    def _save_history_state(self, changed_canvas_rect: QRect = None):
+        """Saves the current lienzo state to the history: a new baseline for an empty history, otherwise the changed area (whole canvas if None)."""
         if self._history_index < len(self._history) - 1:
             self._history = self._history[:self._history_index + 1]
 
-        current_state = self.lienzo.get_canvas_data().copy()
-        self._history.append(current_state)
+        if not self._history:
+            # Clearing and loading an image keep the canvas size, so the shadow buffer is refilled in place
+            canvas_view = self.lienzo.get_canvas_view()
+            if self._history_shadow is None or self._history_shadow.shape != canvas_view.shape:
+                 self._history_shadow = np.empty_like(canvas_view)
+            np.copyto(self._history_shadow, canvas_view)
+            self._history.append(None)
+        else:
+            width, height = self.lienzo.get_size()
+            if changed_canvas_rect is None:
+                 changed_canvas_rect = QRect(0, 0, width, height)
+            changed_canvas_rect = changed_canvas_rect.normalized().intersected(QRect(0, 0, width, height))
+            x, y, w, h = changed_canvas_rect.x(), changed_canvas_rect.y(), changed_canvas_rect.width(), changed_canvas_rect.height()
+            before_patch = self._history_shadow[y:y + h, x:x + w].copy()
+            after_patch = self.lienzo.crop_area((x, y, w, h))
+            if after_patch.size:
+                 self._history_shadow[y:y + h, x:x + w] = after_patch
+            self._history.append(((x, y, w, h), before_patch, after_patch))
         self._history_index += 1
 
         MAX_HISTORY_STATES = 100
         while len(self._history) > MAX_HISTORY_STATES:
-            self._history.pop(0)
+            # The oldest change is folded into the baseline, which needs no pixels of its own
+            self._history.pop(1)
             self._history_index -= 1
 
         self._update_action_states()
 
     def _load_history_state(self, index: int):
-        """Loads a specific state from history and updates the canvas."""
+        """Loads a specific state from history by replaying the changes between it and the current one."""
         if 0 <= index < len(self._history):
-            state_data = self._history[index]
             try:
-                 self.lienzo.set_canvas_data(state_data.copy())
+                 if index < self._history_index:
+                      steps = [(self._history[i][0], self._history[i][1]) for i in range(self._history_index, index, -1)]
+                 else:
+                      steps = [(self._history[i][0], self._history[i][2]) for i in range(self._history_index + 1, index + 1)]
+                 for (x, y, w, h), patch in steps:
+                      if patch.size == 0:
+                           continue
+                      self.lienzo.paste_area((x, y, w, h), patch)
+                      self._history_shadow[y:y + h, x:x + w] = patch
+                      self.canvas_widget.mark_canvas_dirty(QRect(x, y, w, h))
                  self._history_index = index
-                 self.canvas_widget.update()
                  self._update_action_states()
                  self._update_status_bar()
 
@@ -254,17 +284,20 @@ class MainWindow(QMainWindow):
 
     def _undo(self):
         """Slot: Handles the 'Undo' action."""
+        # A stroke still being finalized on the brush thread must land in history first
+        self.canvas_widget.wait_for_idle()
         if self._history_index > 0:
             self._load_history_state(self._history_index - 1)
 
     def _redo(self):
         """Slot: Handles the 'Redo' action."""
+        self.canvas_widget.wait_for_idle()
         if self._history_index < len(self._history) - 1:
             self._load_history_state(self._history_index + 1)
 
-    def _on_stroke_finished(self):
+    def _on_stroke_finished(self, changed_canvas_rect: QRect):
         """Slot: Called by CanvasWidget when a stroke is finished. Save state and update UI."""
-        self._save_history_state()
+        self._save_history_state(changed_canvas_rect)
 
     def _on_tool_triggered(self, action: QAction):
         """Slot: Handles tool selection."""
@@ -277,6 +310,7 @@ class MainWindow(QMainWindow):
     def _new_canvas(self):
         """Slot: Creates a new canvas with user-defined size."""
         print("New canvas requested...")
+        self.canvas_widget.wait_for_idle()
         current_width, current_height = (self.lienzo.get_size() if self.lienzo else (1000, 800))
 
         width, ok_w = QInputDialog.getInt(self, "新建画布", "宽度 (像素):", current_width, 1, 4000, 1)
@@ -381,6 +415,7 @@ class MainWindow(QMainWindow):
     def _load_image(self):
         """Slot: Handles the 'Load Image' action."""
         print("Load image requested...")
+        self.canvas_widget.wait_for_idle()
         file_dialog = QFileDialog(self)
         file_dialog.setWindowTitle("选择要加载的图片")
         file_dialog.setNameFilter("图像文件 (*.png *.jpg *.jpeg *.bmp *.gif)")
@@ -406,7 +441,8 @@ class MainWindow(QMainWindow):
 
     def _save_canvas(self):
          print("Save canvas requested...")
-         canvas_data = self.canvas_widget.get_canvas_image_data() # Get BGR data
+         self.canvas_widget.wait_for_idle()
+         canvas_data = self.canvas_widget.get_canvas_image_data(copy=False) # Get BGR data (read-only view; the file dialog is modal)
          if canvas_data is None or canvas_data.size == 0: QMessageBox.warning(self, "保存失败", "画布为空，没有内容可以保存。"); return
 
          file_dialog = QFileDialog(self)
@@ -437,14 +473,20 @@ class MainWindow(QMainWindow):
 
     def _clear_canvas(self):
         print("Clear canvas requested...")
+        self.canvas_widget.wait_for_idle()
         if self.lienzo:
             self.lienzo.fill((255, 255, 255)) # Fill with white BGR
-            self.canvas_widget.update()
+            self.canvas_widget.mark_canvas_dirty()
             self._history = []
             self._history_index = -1
             self._save_history_state()
             self.statusBar().showMessage("画布已清空。")
 
+    def closeEvent(self, event):
+        """Stops the canvas's brush worker thread before the window goes away."""
+        self.canvas_widget.shutdown()
+        super().closeEvent(event)
+
     def _on_control_panel_parameters_changed(self, params: dict):
         """Slot: Receives brush parameter changes."""
         self.canvas_widget.set_brush_params(params)
@@ -8,9 +8,16 @@ import random
 import os
 from processing.lienzo import Lienzo
 
+# Brush size used when the parameters don't give one; the control panel and canvas start on it too
+DEFAULT_BRUSH_SIZE = 40
+
 _brush_shapes = {}
 _brush_shape_folder = os.path.join(os.path.dirname(__file__), '..', 'resources')
 
+def _clamp(value: float, low: float, high: float) -> float:
+    """Helper: Clamps a scalar with min/max; np.clip costs about ten times as much per scalar call."""
+    return max(low, min(value, high))
+
 def load_brush_shapes():
     global _brush_shapes
     global _brush_shape_folder
@@ -154,17 +161,17 @@ def _apply_single_brush_stamp(
           print("Error: Noise texture slice has wrong shape or is None.")
           local_area_noise_texture = np.ones(local_area_uint8.shape[:2], dtype=np.float32) * 0.5
 
-     base_brush_size = max(1, int(brush_params.get('size', 15)))
-     flow = np.clip(float(brush_params.get('flow', 100)), 0.0, 100.0)
-     density = np.clip(float(brush_params.get('density', 60)), 0.0, 100.0)
-     wetness = np.clip(float(brush_params.get('wetness', 0)), 0.0, 100.0)
-     feibai = np.clip(float(brush_params.get('feibai', 20)), 0.0, 100.0)
-     hardness = np.clip(float(brush_params.get('hardness', 50)), 0.0, 100.0)
+     base_brush_size = max(1, int(brush_params.get('size', DEFAULT_BRUSH_SIZE)))
+     flow = _clamp(float(brush_params.get('flow', 100)), 0.0, 100.0)
+     density = _clamp(float(brush_params.get('density', 60)), 0.0, 100.0)
+     wetness = _clamp(float(brush_params.get('wetness', 0)), 0.0, 100.0)
+     feibai = _clamp(float(brush_params.get('feibai', 20)), 0.0, 100.0)
+     hardness = _clamp(float(brush_params.get('hardness', 50)), 0.0, 100.0)
      brush_type = brush_params.get('type', 'round')
 
-     pos_jitter = np.clip(float(brush_params.get('pos_jitter', 0)), 0.0, 100.0)
-     size_jitter = np.clip(float(brush_params.get('size_jitter', 0)), 0.0, 100.0)
-     angle_jitter_degrees = np.clip(float(brush_params.get('angle_jitter', 0)), 0.0, 180.0)
+     pos_jitter = _clamp(float(brush_params.get('pos_jitter', 0)), 0.0, 100.0)
+     size_jitter = _clamp(float(brush_params.get('size_jitter', 0)), 0.0, 100.0)
+     angle_jitter_degrees = _clamp(float(brush_params.get('angle_jitter', 0)), 0.0, 180.0)
 
      angle_mode = brush_params.get('angle_mode', 'Direction')
      fixed_angle_degrees = float(brush_params.get('fixed_angle', 0))
@@ -243,7 +250,7 @@ def _apply_single_brush_stamp(
           return
 
      base_stamp_opacity = (density / 100.0) * (flow / 100.0)
-     base_stamp_opacity = np.clip(base_stamp_opacity, 0.0, 1.0)
+     base_stamp_opacity = _clamp(base_stamp_opacity, 0.0, 1.0)
 
      feibai_modifier = 1.0
      if feibai > 0:
@@ -285,11 +292,11 @@ def apply_basic_brush_stroke_segment(
     canvas_width, canvas_height = lienzo.get_size()
     if canvas_width <= 0 or canvas_height <= 0: return QRect()
 
-    base_brush_size = max(1, int(brush_params.get('size', 15)))
+    base_brush_size = max(1, int(brush_params.get('size', DEFAULT_BRUSH_SIZE)))
     brush_radius = base_brush_size // 2
 
-    pos_jitter = np.clip(float(brush_params.get('pos_jitter', 0)), 0.0, 100.0)
-    size_jitter = np.clip(float(brush_params.get('size_jitter', 0)), 0.0, 100.0)
+    pos_jitter = _clamp(float(brush_params.get('pos_jitter', 0)), 0.0, 100.0)
+    size_jitter = _clamp(float(brush_params.get('size_jitter', 0)), 0.0, 100.0)
 
     dx_canvas = p1_canvas.x() - p2_canvas.x() # Corrected delta calculation direction for angle? No, atan2 expects (y, x).
     # Let's keep consistent with p1 to p2 for dx, dy. Angle will be from p1 to p2.
@@ -430,7 +437,7 @@ def finalize_stroke(
             lienzo,
             stroke_inked_region_canvas,
             brush_params.get('wetness', 70),
-            brush_params.get('size', 15)
+            brush_params.get('size', DEFAULT_BRUSH_SIZE)
         )
          return final_updated_area_canvas
 
@@ -444,7 +451,7 @@ def apply_localized_blur(
     if lienzo is None or canvas_rect_to_blur.isNull() or wetness <= 0 or canvas_rect_to_blur.width() <= 0 or canvas_rect_to_blur.height() <= 0:
         return QRect()
 
-    canvas_height, canvas_width = lienzo.get_size()
+    canvas_width, canvas_height = lienzo.get_size()
     if canvas_height <= 0 or canvas_width <= 0: return QRect()
 
     brush_size = max(1, int(brush_size))
@@ -494,7 +501,9 @@ def apply_localized_blur(
         print(f"Error cropping Lienzo for blur: {e}. Skipping blur.")
         return QRect()
 
-    original_processing_area_bgr = processing_area_bgr.copy()
+    # crop_area already returned a private copy and bilateralFilter writes a new array, so the crop
+    # itself serves as the unblurred original
+    original_processing_area_bgr = processing_area_bgr
 
     sigma_color = wetness / 100.0 * 150.0
     sigma_color = max(1.0, sigma_color)
@@ -19,6 +19,7 @@ class Lienzo:
         self._width = width
         self._height = height
         self._canvas_data = np.full((height, width, 3), color, dtype=np.uint8)
+        self._version = 0 # Bumped on every change to the pixels
         print(f"Canvas initialized with size {width}x{height} and color {color}")
 
     def get_canvas_data(self) -> np.ndarray:
@@ -27,6 +28,16 @@ class Lienzo:
             return self._canvas_data.copy()
         return np.empty((0, 0, 3), dtype=np.uint8)
 
+    def get_canvas_view(self) -> np.ndarray:
+        """Returns the live canvas NumPy array (BGR uint8) without copying. Callers must not modify it or keep it across set_canvas_data."""
+        if self._canvas_data is not None:
+            return self._canvas_data
+        return np.empty((0, 0, 3), dtype=np.uint8)
+
+    def get_version(self) -> int:
+        """Returns a counter that changes whenever the canvas pixels are modified, for cheap staleness checks."""
+        return self._version
+
     def set_canvas_data(self, data: np.ndarray):
         """Replaces canvas data, converts to BGR, resizes if dimensions mismatch."""
         if data is None or data.size == 0:
@@ -98,6 +109,7 @@ class Lienzo:
         # At this point, 'data' should be HxWx3 uint8 and match target size.
         if data.shape == (target_height, target_width, 3) and data.dtype == np.uint8:
              self._canvas_data = np.ascontiguousarray(data)
+             self._version += 1
         else:
              print(f"FATAL ERROR: Data format mismatch after all processing: {data.shape}, {data.dtype}. Expected ({target_height}, {target_width}, 3), uint8. Cannot set data.")
 
@@ -154,6 +166,7 @@ class Lienzo:
 
         # Ensure data is contiguous before assigning
         self._canvas_data[y1:y2, x1:x2] = np.ascontiguousarray(data)
+        self._version += 1
 
     def fill(self, color: tuple[int, int, int] = (255, 255, 255)):
         """Fills the entire canvas with the specified color (BGR tuple)."""
@@ -164,5 +177,6 @@ class Lienzo:
              clipped_color = (np.clip(color[0], 0, 255), np.clip(color[1], 0, 255), np.clip(color[2], 0, 255))
 
              self._canvas_data[:, :] = clipped_color
+             self._version += 1
         else:
              print("Warning: Cannot fill canvas, lienzo data is None or invalid shape.")
\ No newline at end of file
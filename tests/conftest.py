@@ -0,0 +1,17 @@
+# tests/conftest.py
+
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PyQt5.QtWidgets import QApplication
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    """Shared QApplication for widget tests (offscreen unless QT_QPA_PLATFORM says otherwise)."""
+    return QApplication.instance() or QApplication(sys.argv)
@@ -0,0 +1,74 @@
+# tests/test_control_panel.py
+
+from PyQt5.QtTest import QTest
+
+import gui.control_panel
+from gui.control_panel import ControlPanel
+
+
+class _FakeClock:
+    """Stands in for time.perf_counter so the emit timer's delays can be checked exactly."""
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _make_panel(qapp):
+    panel = ControlPanel()
+    QTest.qWait(50)
+    panel._emit_timer.stop()
+    return panel
+
+
+def test_isolated_change_waits_for_debounce_window(qapp, monkeypatch):
+    clock = _FakeClock()
+    monkeypatch.setattr(gui.control_panel.time, "perf_counter", clock)
+    panel = _make_panel(qapp)
+    received = []
+    panel.parameters_changed.connect(lambda params: received.append(dict(params)))
+
+    clock.now += 1.0 # Well past any rate-limit period from the panel's own start-up emits
+    panel._on_parameter_changed('size', 31)
+
+    assert panel._emit_timer.isActive()
+    assert panel._emit_timer.interval() == round(panel._emit_delay_s * 1000)
+    assert received == []
+    QTest.qWait(round(panel._emit_delay_s * 1000) + 50)
+    assert len(received) == 1 and received[0]['size'] == 31
+
+
+def test_continuous_changes_are_capped_by_rate_limit(qapp, monkeypatch):
+    clock = _FakeClock()
+    monkeypatch.setattr(gui.control_panel.time, "perf_counter", clock)
+    panel = _make_panel(qapp)
+    period_ms = 1000.0 / panel._rate_limit
+
+    # Ticks arriving faster than the debounce window keep pushing it back, but never past one
+    # rate-limit period after the first pending change
+    clock.now += 1.0
+    panel._on_parameter_changed('size', 32)
+    clock.now += 0.025
+    panel._on_parameter_changed('size', 33)
+    assert panel._emit_timer.interval() == round(period_ms - 25)
+
+    # A change right after an emit waits out the rest of the rate-limit period, not just the debounce
+    panel._flush_params()
+    clock.now += 0.003
+    panel._on_parameter_changed('size', 34)
+    assert panel._emit_timer.interval() == round(period_ms - 3)
+
+
+def test_fresh_window_brush_color_matches_panel(qapp):
+    from gui.main_window import MainWindow
+
+    window = MainWindow()
+    try:
+        QTest.qWait(100)
+        panel_color = window.control_panel.get_current_parameters()['color']
+        qapp.processEvents()
+        assert panel_color == (0, 0, 0)
+        assert window.canvas_widget._current_brush_params['color'] == panel_color
+    finally:
+        window.close()
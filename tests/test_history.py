@@ -0,0 +1,63 @@
+# tests/test_history.py
+
+from PyQt5.QtCore import Qt, QEvent, QPoint, QPointF
+from PyQt5.QtGui import QMouseEvent
+from PyQt5.QtTest import QTest
+
+import gui.brush_worker
+import gui.ink_canvas_widget
+from gui.main_window import MainWindow
+
+
+def _draw_stroke(qapp, canvas_widget, points):
+    """Drags the left button through points (widget coordinates) and waits for the stroke to land in history."""
+    QTest.mousePress(canvas_widget, Qt.LeftButton, Qt.NoModifier, QPoint(*points[0]))
+    for x, y in points[1:]:
+        qapp.sendEvent(canvas_widget, QMouseEvent(QEvent.MouseMove, QPointF(x, y), Qt.NoButton, Qt.LeftButton, Qt.NoModifier))
+        QTest.qWait(25) # Lets the coalescing segment timer flush each point
+    QTest.mouseRelease(canvas_widget, Qt.LeftButton, Qt.NoModifier, QPoint(*points[-1]))
+    canvas_widget.wait_for_idle()
+    qapp.processEvents()
+
+
+def test_undo_redo_after_a_segment_fails_mid_stroke(qapp, monkeypatch):
+    real_apply_segment = gui.brush_worker.apply_basic_brush_stroke_segment
+    calls = []
+
+    def failing_apply_segment(*args):
+        calls.append(args)
+        if len(calls) > 2:
+             raise RuntimeError("engine failure")
+        return real_apply_segment(*args)
+
+    monkeypatch.setattr(gui.ink_canvas_widget.QMessageBox, "critical", lambda *args: None)
+    window = MainWindow()
+    window.show()
+    canvas_widget = window.canvas_widget
+    qapp.processEvents()
+    try:
+        blank = window.lienzo.get_canvas_data()
+
+        # The first stroke fails after two pieces; what it inked by then stays on the canvas
+        monkeypatch.setattr(gui.brush_worker, "apply_basic_brush_stroke_segment", failing_apply_segment)
+        _draw_stroke(qapp, canvas_widget, [(100, 100), (140, 120), (180, 140), (220, 160), (260, 180)])
+        after_failed = window.lienzo.get_canvas_data()
+        assert (after_failed != blank).any()
+        assert window._history_index == 1
+
+        # The second stroke crosses the first one's ink
+        monkeypatch.setattr(gui.brush_worker, "apply_basic_brush_stroke_segment", real_apply_segment)
+        _draw_stroke(qapp, canvas_widget, [(100, 160), (140, 140), (180, 120), (220, 100)])
+        after_second = window.lienzo.get_canvas_data()
+        assert window._history_index == 2
+
+        window._undo()
+        assert (window.lienzo.get_canvas_data() == after_failed).all()
+        window._undo()
+        assert (window.lienzo.get_canvas_data() == blank).all()
+        window._redo()
+        assert (window.lienzo.get_canvas_data() == after_failed).all()
+        window._redo()
+        assert (window.lienzo.get_canvas_data() == after_second).all()
+    finally:
+        window.close()
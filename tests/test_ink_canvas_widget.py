@@ -0,0 +1,65 @@
+# tests/test_ink_canvas_widget.py
+
+import numpy as np
+from PyQt5 import sip
+from PyQt5.QtCore import QPoint, qInstallMessageHandler
+
+import gui.ink_canvas_widget
+from gui.ink_canvas_widget import InkCanvasWidget
+from processing.lienzo import Lienzo
+
+
+def _make_widget(qapp):
+    widget = InkCanvasWidget()
+    lienzo = Lienzo(width=200, height=150)
+    widget.set_lienzo(lienzo)
+    return widget, lienzo
+
+
+def test_shutdown_runs_queued_segments_first(qapp):
+    widget, lienzo = _make_widget(qapp)
+    blank = lienzo.get_canvas_data()
+
+    widget._submit_segment(QPoint(20, 20), QPoint(180, 130))
+    widget.shutdown()
+
+    assert not widget._brush_thread.isRunning()
+    assert (lienzo.get_canvas_data() != blank).any()
+    widget.shutdown() # A second call (e.g. aboutToQuit after closeEvent) is a no-op
+
+
+def test_destroying_widget_stops_worker_thread(qapp):
+    widget, _ = _make_widget(qapp)
+    brush_thread = widget._brush_thread
+    messages = []
+    previous_handler = qInstallMessageHandler(lambda mode, context, message: messages.append(message))
+    try:
+        sip.delete(widget)
+    finally:
+        qInstallMessageHandler(previous_handler)
+
+    assert not brush_thread.isRunning()
+    assert not any("QThread" in message for message in messages)
+
+
+def test_predicted_tail_repaint_does_not_reconvert_whole_canvas(qapp, monkeypatch):
+    widget, lienzo = _make_widget(qapp)
+    try:
+        widget._sync_display_image()
+        # A segment inked on the worker whose segment_done hasn't been handled yet
+        lienzo.paste_area((150, 100, 10, 10), np.zeros((10, 10, 3), dtype=np.uint8))
+
+        converted_shapes = []
+        real_cvt_color = gui.ink_canvas_widget.cv2.cvtColor
+        def recording_cvt_color(src, *args, **kwargs):
+            converted_shapes.append(src.shape[:2])
+            return real_cvt_color(src, *args, **kwargs)
+        monkeypatch.setattr(gui.ink_canvas_widget.cv2, "cvtColor", recording_cvt_color)
+
+        widget._set_predicted_segment((QPoint(10, 10), QPoint(20, 15)))
+        widget._sync_display_image()
+
+        assert converted_shapes
+        assert (150, 200) not in converted_shapes
+    finally:
+        widget.shutdown()